@@ -28,6 +28,7 @@ then
   echo "Skip migration and setup"
 else
   uv run manage.py migrate
+  uv run manage.py createcachetable
   uv run manage.py setup
   echo "Generate OpenAPI schema"
   uv run manage.py spectacular > schema.yml
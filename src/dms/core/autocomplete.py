@@ -16,10 +16,13 @@ from dms.services.autocomplete import (
     ServiceKeywordAutocomplete,
     ServiceTechnologyAutocomplete,
 )
+from dms.shared.autocomplete import TrigramAutocompleteMixin
 from dms.users.autocomplete import UserAutocomplete
 
 
-class TagAutocomplete(LoginRequiredMixin, autocomplete.Select2QuerySetView):
+class TagAutocomplete(
+    LoginRequiredMixin, TrigramAutocompleteMixin, autocomplete.Select2QuerySetView
+):
     model = Tag
     search_fields = ["name"]
 
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.6 on 2026-10-18 10:02
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0002_alter_genericstringtaggeditem_object_id"),
+        (
+            "taggit",
+            "0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx",
+        ),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        # taggit.Tag is a third-party model, the index is created here
+        migrations.RunSQL(
+            sql="CREATE INDEX IF NOT EXISTS tag_name_trgm_idx "
+            "ON taggit_tag USING gin (name gin_trgm_ops);",
+            reverse_sql="DROP INDEX IF EXISTS tag_name_trgm_idx;",
+        ),
+    ]
@@ -37,6 +37,7 @@ router.register(
     basename="dataset-relationships",
 )
 router.register("datatables", datasets_views.DataTableViewSet, basename="datatables")
+router.register("changes", datasets_views.ChangeViewSet, basename="changes")
 
 app_name = "api_v1"
 
@@ -58,4 +59,7 @@ urlpatterns = [
         SpectacularRedocView.as_view(url_name="api_v1:schema"),
         name="redoc",
     ),
+    *datasets_views.DatasetViewSet.tile_urlpatterns("datasets", "datasets"),
+    *datasets_views.ResourceViewSet.tile_urlpatterns("resources", "resources"),
+    *datasets_views.DataTableViewSet.tile_urlpatterns("datatables", "datatables"),
 ] + router.urls
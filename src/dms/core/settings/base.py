@@ -576,6 +576,13 @@ DJANGO_VITE = {
 DATASETS_TITILER_URL = env("DATASETS_TITILER_URL", default="/titiler")
 DATASETS_NINA_MAP_PREVIEW = env("DATASETS_NINA_MAP_PREVIEW", default=None)
 DATASETS_DUCKUI_URL = env("DATASETS_DUCKUI_URL", default="/duckui/")
+DATASETS_METADATA_CONCURRENCY = env.int("DATASETS_METADATA_CONCURRENCY", default=8)
+DATASETS_METADATA_HOST_CONCURRENCY = env.int(
+    "DATASETS_METADATA_HOST_CONCURRENCY", default=2
+)
+DATASETS_METADATA_S3_ENDPOINT_URL = env(
+    "DATASETS_METADATA_S3_ENDPOINT_URL", default=None
+)
 FASTDOC_CONVERT_API_URL = env("FASTDOC_CONVERT_API_URL", default=None)
 
 
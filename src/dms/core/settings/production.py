@@ -14,18 +14,12 @@ DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)  # no
 
 # CACHES
 # ------------------------------------------------------------------------------
-# CACHES = {
-#     "default": {
-#         "BACKEND": "django_redis.cache.RedisCache",
-#         "LOCATION": env("REDIS_URL"),
-#         "OPTIONS": {
-#             "CLIENT_CLASS": "django_redis.client.DefaultClient",
-#             # Mimicing memcache behavior.
-#             # https://github.com/jazzband/django-redis#memcached-exceptions-behavior
-#             "IGNORE_EXCEPTIONS": True,
-#         },
-#     }
-# }
+# https://docs.djangoproject.com/en/dev/ref/settings/#caches
+# Cached pages are invalidated from any process, so the backend is shared by
+# the workers: a table of the database by default (manage.py
+# createcachetable), or filecache:// on a shared volume.
+CACHES = {"default": env.cache("DJANGO_CACHE_URL", default="dbcache://django_cache")}
+CACHES["default"]["TIMEOUT"] = env.int("DJANGO_CACHE_TIMEOUT", default=60 * 60 * 24)
 
 # SECURITY
 # ------------------------------------------------------------------------------
@@ -1,7 +1,11 @@
 from rest_framework import serializers
 from rest_framework_gis.serializers import GeoFeatureModelSerializer
 
+from dms.shared.api import SparseFieldsSerializerMixin
+
+from ..enums import RelationshipType
 from ..models import (
+    Change,
     Dataset,
     DatasetRelationship,
     DataTable,
@@ -24,7 +28,9 @@ class DatasetGeoSerializer(GeoFeatureModelSerializer):
         auto_bbox = True
 
 
-class DatasetSerializer(serializers.HyperlinkedModelSerializer):
+class DatasetSerializer(
+    SparseFieldsSerializerMixin, serializers.HyperlinkedModelSerializer
+):
     project = serializers.HyperlinkedRelatedField(
         view_name="api_v1:projects-detail", read_only=True
     )
@@ -63,7 +69,9 @@ class DatasetListSerializer(DatasetSerializer):
         )
 
 
-class ResourceListSerializer(serializers.HyperlinkedModelSerializer):
+class ResourceListSerializer(
+    SparseFieldsSerializerMixin, serializers.HyperlinkedModelSerializer
+):
     dataset = serializers.HyperlinkedRelatedField(
         view_name="api_v1:datasets-detail", read_only=True
     )
@@ -89,7 +97,7 @@ class ResourceListSerializer(serializers.HyperlinkedModelSerializer):
     def to_representation(self, instance):
         data = super().to_representation(instance)
         # Hide URI if the dataset is under embargo
-        if instance.dataset.under_embargo:
+        if "uri" in data and instance.under_embargo:
             data["uri"] = None
         return data
 
@@ -115,7 +123,9 @@ class ResourceGeoSerializer(GeoFeatureModelSerializer):
         auto_bbox = True
 
 
-class DatasetRelationshipSerializer(serializers.HyperlinkedModelSerializer):
+class DatasetRelationshipSerializer(
+    SparseFieldsSerializerMixin, serializers.HyperlinkedModelSerializer
+):
     source = serializers.HyperlinkedRelatedField(
         view_name="api_v1:datasets-detail", read_only=True
     )
@@ -154,7 +164,61 @@ class DatasetRelationshipCreateSerializer(serializers.ModelSerializer):
         }
 
 
-class MapResourceSerializer(serializers.HyperlinkedModelSerializer):
+class RelationshipNeighbourQuerySerializer(serializers.Serializer):
+    dataset = serializers.CharField()
+
+
+class RelationshipGraphQuerySerializer(RelationshipNeighbourQuerySerializer):
+    depth = serializers.IntegerField(required=False, min_value=0)
+    type = serializers.ListField(
+        child=serializers.ChoiceField(choices=RelationshipType.choices),
+        required=False,
+    )
+    limit = serializers.IntegerField(required=False, min_value=1)
+
+
+class RelationshipGraphNodeSerializer(serializers.Serializer):
+    url = serializers.HyperlinkedIdentityField(view_name="api_v1:datasets-detail")
+    id = serializers.CharField()
+    title = serializers.CharField()
+    depth = serializers.IntegerField()
+    relationship_types = serializers.ListField(child=serializers.CharField())
+
+
+class RelationshipGraphEdgeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DatasetRelationship
+        fields = ("uuid", "source_id", "target_id", "type")
+
+
+class RelationshipGraphSerializer(serializers.Serializer):
+    nodes = RelationshipGraphNodeSerializer(many=True)
+    edges = RelationshipGraphEdgeSerializer(many=True)
+    truncated = serializers.BooleanField()
+
+
+class NeighbourSerializer(serializers.Serializer):
+    url = serializers.HyperlinkedRelatedField(
+        view_name="api_v1:datasets-detail", read_only=True, source="neighbour_id"
+    )
+    id = serializers.CharField(source="neighbour_id")
+    title = serializers.CharField(source="neighbour_title")
+    degree = serializers.IntegerField(source="neighbour_degree")
+    relationship_types = serializers.ListField(
+        child=serializers.CharField(), source="neighbour_relationship_types"
+    )
+
+
+class RelationshipNeighbourSerializer(RelationshipGraphEdgeSerializer):
+    neighbour = NeighbourSerializer(source="*")
+
+    class Meta(RelationshipGraphEdgeSerializer.Meta):
+        fields = RelationshipGraphEdgeSerializer.Meta.fields + ("neighbour",)
+
+
+class MapResourceSerializer(
+    SparseFieldsSerializerMixin, serializers.HyperlinkedModelSerializer
+):
     dataset = serializers.HyperlinkedRelatedField(
         view_name="api_v1:datasets-detail", read_only=True
     )
@@ -166,7 +230,9 @@ class MapResourceSerializer(serializers.HyperlinkedModelSerializer):
         fields = ResourceSerializer.Meta.fields + ("map_type",)
 
 
-class RasterResourceSerializer(serializers.HyperlinkedModelSerializer):
+class RasterResourceSerializer(
+    SparseFieldsSerializerMixin, serializers.HyperlinkedModelSerializer
+):
     dataset = serializers.HyperlinkedRelatedField(
         view_name="api_v1:datasets-detail", read_only=True
     )
@@ -180,7 +246,9 @@ class RasterResourceSerializer(serializers.HyperlinkedModelSerializer):
         fields = ResourceSerializer.Meta.fields + ("titiler",)
 
 
-class TabularResourceSerializer(serializers.HyperlinkedModelSerializer):
+class TabularResourceSerializer(
+    SparseFieldsSerializerMixin, serializers.HyperlinkedModelSerializer
+):
     dataset = serializers.HyperlinkedRelatedField(
         view_name="api_v1:datasets-detail", read_only=True
     )
@@ -194,7 +262,9 @@ class TabularResourceSerializer(serializers.HyperlinkedModelSerializer):
         fields = ResourceSerializer.Meta.fields
 
 
-class PartitionedResourceSerializer(serializers.HyperlinkedModelSerializer):
+class PartitionedResourceSerializer(
+    SparseFieldsSerializerMixin, serializers.HyperlinkedModelSerializer
+):
     dataset = serializers.HyperlinkedRelatedField(
         view_name="api_v1:datasets-detail", read_only=True
     )
@@ -208,7 +278,9 @@ class PartitionedResourceSerializer(serializers.HyperlinkedModelSerializer):
         fields = ResourceSerializer.Meta.fields
 
 
-class DataTableListSerializer(serializers.HyperlinkedModelSerializer):
+class DataTableListSerializer(
+    SparseFieldsSerializerMixin, serializers.HyperlinkedModelSerializer
+):
     resource = serializers.HyperlinkedRelatedField(
         view_name="api_v1:resources-detail", read_only=True
     )
@@ -243,3 +315,9 @@ class DataTableSerializer(DataTableListSerializer):
             "geometryFields",
             "metadata",
         )
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Change
+        fields = ("entity", "object_id", "action", "changed_at")
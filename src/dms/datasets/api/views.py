@@ -1,12 +1,37 @@
+from collections import Counter
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Concat
+from django.http import Http404
+from django.utils.timezone import now
+from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.pagination import CursorPagination
+from rest_framework.exceptions import APIException, PermissionDenied, ValidationError
+from rest_framework.pagination import BasePagination, CursorPagination
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
 from rest_framework.viewsets import GenericViewSet, ModelViewSet, mixins
 from rules.contrib.rest_framework import AutoPermissionViewSetMixin
 
+from dms.shared.api import (
+    CachedRetrieveViewSetMixin,
+    ConditionalGetViewSetMixin,
+    CoverageViewSetMixin,
+    ExportViewSetMixin,
+    SparseFieldsViewSetMixin,
+    VectorTileViewSetMixin,
+)
+from dms.shared.cache import ALL_OBJECTS, bump_versions
+
 from .. import filters
+from ..conf import settings
+from ..libs.graph import neighbourhood, relationship_graph
 from ..models import (
+    Change,
     Dataset,
     DatasetRelationship,
     DataTable,
@@ -15,8 +40,10 @@ from ..models import (
     RasterResource,
     Resource,
     TabularResource,
+    defer_compute_extent,
 )
 from ..schemas import dataset_metadata
+from ..tasks import defer_metadata_jobs
 from . import serializers
 
 
@@ -25,21 +52,36 @@ class DefaultCursorPagination(CursorPagination):
     ordering = "-id"
 
 
-class DatasetViewSet(AutoPermissionViewSetMixin, ModelViewSet):
+class DatasetViewSet(
+    CoverageViewSetMixin,
+    VectorTileViewSetMixin,
+    ExportViewSetMixin,
+    SparseFieldsViewSetMixin,
+    AutoPermissionViewSetMixin,
+    ConditionalGetViewSetMixin,
+    CachedRetrieveViewSetMixin,
+    ModelViewSet,
+):
     queryset = Dataset.objects.all()
     serializer_class = serializers.DatasetSerializer
     pagination_class = DefaultCursorPagination
     filterset_class = filters.DatasetFilter
+    conditional_embargo_field = "embargo_end_date"
 
     permission_type_map = {
         **AutoPermissionViewSetMixin.permission_type_map,
         "metadata_schema": "view",
         "geojson": "view",
         "upload_resource": "change",
+        "export": "view",
+        "export_extents": "view",
+        "features": "view",
+        "tiles": "view",
+        "coverage": "view",
     }
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ("list", "export"):
             return serializers.DatasetListSerializer
         if self.action == "geojson":
             return serializers.DatasetGeoSerializer
@@ -61,31 +103,195 @@ class DatasetViewSet(AutoPermissionViewSetMixin, ModelViewSet):
         return self.retrieve(request=request, pk=pk)
 
 
-class ResourceViewSet(AutoPermissionViewSetMixin, ModelViewSet):
+class ResourceBulkViewSetMixin:
+    """
+    Viewset mixin adding bulk/ to the resource viewsets, for lists of up to
+    DATASETS_BULK_MAX_ITEMS resources:
+
+    - POST creates the resources of the list
+    - PATCH updates the resources of the list, identified by their id
+    - DELETE deletes the resources of a list of ids
+
+    Permissions are checked once per target dataset, rows are written with
+    bulk queries and the metadata inference is enqueued in batches.
+    """
+
+    # object permissions are checked on the target datasets
+    permission_type_map = {
+        **AutoPermissionViewSetMixin.permission_type_map,
+        "bulk_create": "add",
+        "bulk_update": "change",
+        "bulk_destroy": "delete",
+    }
+
+    def get_bulk_serializer(self, data, **kwargs):
+        serializer = self.get_serializer(
+            data=data,
+            many=True,
+            allow_empty=False,
+            max_length=settings.DATASETS_BULK_MAX_ITEMS,
+            **kwargs,
+        )
+        # ids are checked with a single query instead of one per item
+        id_field = serializer.child.fields["id"]
+        id_field.validators = [
+            v for v in id_field.validators if not isinstance(v, UniqueValidator)
+        ]
+        return serializer
+
+    def check_dataset_permissions(self, dataset_ids):
+        """Return the datasets by id, if the user can change all of them."""
+        dataset_ids = set(dataset_ids)
+        datasets = Dataset.objects.in_bulk(dataset_ids)
+        missing = sorted(dataset_ids - datasets.keys())
+        if missing:
+            raise ValidationError({"dataset_id": [f"Unknown datasets: {missing}"]})
+
+        denied = sorted(
+            pk
+            for pk, dataset in datasets.items()
+            if not self.request.user.has_perm("datasets.change_dataset", dataset)
+        )
+        if denied:
+            raise PermissionDenied(f"You cannot change the datasets: {denied}")
+        return datasets
+
+    @staticmethod
+    def check_unique_ids(ids):
+        duplicates = sorted(pk for pk, count in Counter(ids).items() if count > 1)
+        if duplicates:
+            raise ValidationError({"id": [f"Duplicate ids: {duplicates}"]})
+
+    @action(detail=False, methods=["post"], url_path="bulk", url_name="bulk")
+    def bulk_create(self, request):
+        serializer = self.get_bulk_serializer(request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data
+
+        ids = [item["id"] for item in items]
+        self.check_unique_ids(ids)
+        existing = sorted(
+            Resource.objects.filter(pk__in=ids).values_list("pk", flat=True)
+        )
+        if existing:
+            raise ValidationError({"id": [f"Resources already exist: {existing}"]})
+        datasets = self.check_dataset_permissions(item["dataset_id"] for item in items)
+
+        model = self.get_queryset().model
+        objs = [model(**item) for item in items]
+        for obj in objs:
+            obj.dataset = datasets[obj.dataset_id]
+        model.objects.bulk_create_resources(objs)
+        bump_versions(Dataset, datasets)
+        transaction.on_commit(partial(defer_metadata_jobs, objs))
+
+        data = self.get_serializer(objs, many=True).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        serializer = self.get_bulk_serializer(request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data
+
+        if any("id" not in item for item in items):
+            raise ValidationError({"id": ["Every item needs the id of a resource."]})
+        ids = [item["id"] for item in items]
+        self.check_unique_ids(ids)
+        instances = self.get_queryset().in_bulk(ids)
+        missing = sorted(set(ids) - instances.keys())
+        if missing:
+            raise ValidationError({"id": [f"Unknown resources: {missing}"]})
+        datasets = self.check_dataset_permissions(
+            [obj.dataset_id for obj in instances.values()]
+            + [item["dataset_id"] for item in items if "dataset_id" in item]
+        )
+
+        fields = {"last_modified_at"}
+        timestamp = now()
+        changed_uri = []
+        outdated_extents = set()
+        for item in items:
+            obj = instances[item.pop("id")]
+            if "uri" in item and item["uri"] != obj.uri:
+                changed_uri.append(obj)
+            if obj.extent and item.get("dataset_id", obj.dataset_id) != obj.dataset_id:
+                outdated_extents.update((obj.dataset_id, item["dataset_id"]))
+            for name, value in item.items():
+                setattr(obj, name, value)
+            obj.last_modified_at = timestamp
+            fields.update(item)
+
+        objs = list(instances.values())
+        self.get_queryset().model.objects.bulk_update(objs, sorted(fields))
+        bump_versions(Resource, [*instances, ALL_OBJECTS])
+        bump_versions(Dataset, datasets)
+
+        transaction.on_commit(partial(defer_metadata_jobs, changed_uri))
+        for dataset_id in outdated_extents:
+            transaction.on_commit(partial(defer_compute_extent, dataset_id))
+        return Response(self.get_serializer(objs, many=True).data)
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request):
+        ids = serializers.serializers.ListField(
+            child=serializers.serializers.CharField(),
+            allow_empty=False,
+            max_length=settings.DATASETS_BULK_MAX_ITEMS,
+        ).run_validation(request.data)
+        self.check_unique_ids(ids)
+
+        queryset = self.get_queryset().model.objects.filter(pk__in=ids)
+        found = dict(queryset.values_list("pk", "dataset_id"))
+        missing = sorted(set(ids) - found.keys())
+        if missing:
+            raise ValidationError({"id": [f"Unknown resources: {missing}"]})
+        dataset_ids = set(found.values())
+        self.check_dataset_permissions(dataset_ids)
+
+        queryset.delete()
+        for dataset_id in dataset_ids:
+            transaction.on_commit(partial(defer_compute_extent, dataset_id))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ResourceViewSet(
+    CoverageViewSetMixin,
+    VectorTileViewSetMixin,
+    ResourceBulkViewSetMixin,
+    ExportViewSetMixin,
+    SparseFieldsViewSetMixin,
+    AutoPermissionViewSetMixin,
+    ConditionalGetViewSetMixin,
+    CachedRetrieveViewSetMixin,
+    ModelViewSet,
+):
     queryset = Resource.objects.all()
     serializer_class = serializers.ResourceSerializer
     pagination_class = DefaultCursorPagination
     filterset_class = filters.ResourceRestFilter
+    # the embargo of the dataset hides the uri
+    conditional_fields = ("last_modified_at", "dataset__last_modified_at")
+    conditional_embargo_field = "dataset__embargo_end_date"
+    tile_fields = ("id", "title", "dataset_id")
 
     def get_queryset(self):
-        return (
-            super()
-            .get_queryset()
-            .select_subclasses(
-                RasterResource,
-                TabularResource,
-            )
-        )
+        return super().get_queryset().for_listing(RasterResource, TabularResource)
 
     permission_type_map = {
-        **AutoPermissionViewSetMixin.permission_type_map,
+        **ResourceBulkViewSetMixin.permission_type_map,
         "geojson": "view",
+        "export": "view",
+        "export_extents": "view",
+        "features": "view",
+        "tiles": "view",
+        "coverage": "view",
     }
 
     def get_serializer_class(self):
         if self.action == "geojson":
             return serializers.ResourceGeoSerializer
-        elif self.action == "list":
+        elif self.action in ("list", "export"):
             return serializers.ResourceListSerializer
         return super().get_serializer_class()
 
@@ -102,6 +308,7 @@ class RelCursorPagination(CursorPagination):
 
 
 class DatasetRelationshipViewSet(
+    SparseFieldsViewSetMixin,
     AutoPermissionViewSetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
@@ -114,11 +321,55 @@ class DatasetRelationshipViewSet(
     filterset_class = filters.DatasetRelationshipFilter
     lookup_field = "uuid"
 
+    permission_type_map = {
+        **AutoPermissionViewSetMixin.permission_type_map,
+        "graph": "view",
+        "neighbours": "view",
+    }
+
     def get_serializer_class(self):
         if self.action == "create":
             return serializers.DatasetRelationshipCreateSerializer
         return super().get_serializer_class()
 
+    @action(detail=False, methods=["get"], url_path="graph")
+    def graph(self, request):
+        """
+        Relationship graph around ?dataset=, up to ?depth= hops, following
+        only the relationships of the given ?type= and with at most ?limit=
+        datasets.
+        """
+        params = serializers.RelationshipGraphQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        graph = relationship_graph(
+            params.validated_data["dataset"],
+            depth=params.validated_data.get("depth"),
+            types=params.validated_data.get("type"),
+            limit=params.validated_data.get("limit"),
+        )
+        if not graph.nodes:
+            raise Http404
+        serializer = serializers.RelationshipGraphSerializer(
+            graph, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get"], url_path="neighbours")
+    def neighbours(self, request):
+        """
+        Relationships of ?dataset=, in either direction, with the dataset at the
+        other end and its degree, one page at a time.
+        """
+        params = serializers.RelationshipNeighbourQuerySerializer(
+            data=request.query_params
+        )
+        params.is_valid(raise_exception=True)
+        page = self.paginate_queryset(neighbourhood(params.validated_data["dataset"]))
+        serializer = serializers.RelationshipNeighbourSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
     def perform_create(self, serializer):
         if self.request.user.has_perm(
             "datasets.change_dataset", serializer.validated_data.get("source")
@@ -137,32 +388,68 @@ class DatasetRelationshipViewSet(
         raise serializers.serializers.ValidationError("You are not authorized")
 
 
-class MapResourceViewSet(AutoPermissionViewSetMixin, ModelViewSet):
+class MapResourceViewSet(
+    ResourceBulkViewSetMixin,
+    SparseFieldsViewSetMixin,
+    AutoPermissionViewSetMixin,
+    ConditionalGetViewSetMixin,
+    CachedRetrieveViewSetMixin,
+    ModelViewSet,
+):
     queryset = MapResource.objects.all()
     serializer_class = serializers.MapResourceSerializer
     pagination_class = DefaultCursorPagination
     filterset_class = filters.ResourceFilter
+    conditional_fields = ("last_modified_at", "dataset__last_modified_at")
+    conditional_embargo_field = "dataset__embargo_end_date"
 
 
-class RasterResourceViewSet(AutoPermissionViewSetMixin, ModelViewSet):
+class RasterResourceViewSet(
+    ResourceBulkViewSetMixin,
+    SparseFieldsViewSetMixin,
+    AutoPermissionViewSetMixin,
+    ConditionalGetViewSetMixin,
+    CachedRetrieveViewSetMixin,
+    ModelViewSet,
+):
     queryset = RasterResource.objects.all()
     serializer_class = serializers.RasterResourceSerializer
     pagination_class = DefaultCursorPagination
     filterset_class = filters.ResourceFilter
+    conditional_fields = ("last_modified_at", "dataset__last_modified_at")
+    conditional_embargo_field = "dataset__embargo_end_date"
 
 
-class TabularResourceViewSet(AutoPermissionViewSetMixin, ModelViewSet):
+class TabularResourceViewSet(
+    ResourceBulkViewSetMixin,
+    SparseFieldsViewSetMixin,
+    AutoPermissionViewSetMixin,
+    ConditionalGetViewSetMixin,
+    CachedRetrieveViewSetMixin,
+    ModelViewSet,
+):
     queryset = TabularResource.objects.all()
     serializer_class = serializers.TabularResourceSerializer
     pagination_class = DefaultCursorPagination
     filterset_class = filters.ResourceFilter
+    conditional_fields = ("last_modified_at", "dataset__last_modified_at")
+    conditional_embargo_field = "dataset__embargo_end_date"
 
 
-class PartitionedResourceViewSet(AutoPermissionViewSetMixin, ModelViewSet):
+class PartitionedResourceViewSet(
+    ResourceBulkViewSetMixin,
+    SparseFieldsViewSetMixin,
+    AutoPermissionViewSetMixin,
+    ConditionalGetViewSetMixin,
+    CachedRetrieveViewSetMixin,
+    ModelViewSet,
+):
     queryset = PartitionedResource.objects.all()
     serializer_class = serializers.PartitionedResourceSerializer
     pagination_class = DefaultCursorPagination
     filterset_class = filters.ResourceFilter
+    conditional_fields = ("last_modified_at", "dataset__last_modified_at")
+    conditional_embargo_field = "dataset__embargo_end_date"
 
 
 class TableCursorPagination(CursorPagination):
@@ -171,6 +458,9 @@ class TableCursorPagination(CursorPagination):
 
 
 class DataTableViewSet(
+    VectorTileViewSetMixin,
+    ExportViewSetMixin,
+    SparseFieldsViewSetMixin,
     AutoPermissionViewSetMixin,
     mixins.ListModelMixin,
     GenericViewSet,
@@ -179,8 +469,85 @@ class DataTableViewSet(
     serializer_class = serializers.DataTableSerializer
     pagination_class = TableCursorPagination
     filterset_class = filters.DataTableFilter
+    tile_fields = ("resource_id", "name")
+
+    # DataTable has no rules permissions, like list the exports are public
+    permission_type_map = {
+        **AutoPermissionViewSetMixin.permission_type_map,
+        "export": None,
+        "export_extents": None,
+        "features": None,
+        "tiles": None,
+    }
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ("list", "export"):
             return serializers.DataTableListSerializer
         return super().get_serializer_class()
+
+    def get_export_extents(self, queryset, geojson=None):
+        return (
+            queryset.exclude(extent=None)
+            .annotate(
+                export_id=Concat("resource_id", Value("__"), "name"),
+                export_geojson=geojson or self.get_extent_geojson(),
+            )
+            .values_list("export_id", "name", "export_geojson")
+        )
+
+
+class ChangeTokenExpired(APIException):
+    status_code = 410
+    default_detail = "The change token has expired, a full resync is needed."
+    default_code = "change_token_expired"
+
+
+class ChangeFeedPagination(BasePagination):
+    """
+    Pagination of the change feed by a "<txid>.<id>" token of the last change
+    read. Only the changes of finished transactions are returned, so a change
+    committed late cannot be skipped by a token that went past it.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.token = request.query_params.get("since") or "0.0"
+        try:
+            txid, last_id = (int(p) for p in self.token.split("."))
+        except ValueError:
+            raise ValidationError({"since": "Invalid change token."}) from None
+
+        if last_id and not Change.objects.filter(id=last_id).exists():
+            raise ChangeTokenExpired()
+
+        queryset = queryset.filter(
+            Q(txid__gt=txid) | Q(txid=txid, id__gt=last_id),
+            txid__lt=RawSQL(
+                "pg_snapshot_xmin(pg_current_snapshot())::text::bigint", []
+            ),
+        ).order_by("txid", "id")
+
+        page_size = settings.DATASETS_CHANGES_PAGE_SIZE
+        page = list(queryset[: page_size + 1])
+        self.has_more = len(page) > page_size
+        page = page[:page_size]
+        if page:
+            self.token = f"{page[-1].txid}.{page[-1].id}"
+        return page
+
+    def get_paginated_response(self, data):
+        return Response(
+            {"next_token": self.token, "has_more": self.has_more, "results": data}
+        )
+
+
+class ChangeViewSet(AutoPermissionViewSetMixin, mixins.ListModelMixin, GenericViewSet):
+    """
+    Changes of datasets, resources, data tables and relationships since the
+    ?since= token, including deletions. Start without a token, then pass the
+    next_token of the previous response.
+    """
+
+    queryset = Change.objects.all()
+    serializer_class = serializers.ChangeSerializer
+    pagination_class = ChangeFeedPagination
+    filterset_class = filters.ChangeFilter
@@ -1,5 +1,25 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 
 class DatasetConfig(AppConfig):
     name = "dms.datasets"
+
+    def ready(self):
+        from dms.core.models import GenericStringTaggedItem
+
+        from .cache import (
+            CACHED_MODELS,
+            invalidate_cached_pages,
+            invalidate_contributor_pages,
+            invalidate_tagged,
+        )
+
+        for model in CACHED_MODELS:
+            post_save.connect(invalidate_cached_pages, sender=model)
+            post_delete.connect(invalidate_cached_pages, sender=model)
+        # the dataset pages show the name and email of their contributors
+        post_save.connect(invalidate_contributor_pages, sender=settings.AUTH_USER_MODEL)
+        # taggit sends m2m_changed for the tags, with the through model
+        m2m_changed.connect(invalidate_tagged, sender=GenericStringTaggedItem)
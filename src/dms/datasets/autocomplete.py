@@ -1,9 +1,11 @@
 from dal import autocomplete
 
+from dms.shared.autocomplete import TrigramAutocompleteMixin
+
 from .models import Dataset
 
 
-class DatasetAutocomplete(autocomplete.Select2QuerySetView):
+class DatasetAutocomplete(TrigramAutocompleteMixin, autocomplete.Select2QuerySetView):
     model = Dataset
     search_fields = [
         "name",
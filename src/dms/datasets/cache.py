@@ -0,0 +1,96 @@
+from django.db.models import Q
+
+from dms.shared.cache import ALL_OBJECTS, bump_versions
+
+from .models import (
+    Dataset,
+    DatasetContribution,
+    DatasetRelationship,
+    DataTable,
+    Resource,
+)
+
+# fields shown or filtered by the vector tiles and coverage of resources
+RESOURCE_TILE_FIELDS = ("extent", "title", "dataset")
+
+# fields of the users shown as contributors by the cached dataset pages
+CONTRIBUTOR_FIELDS = {"username", "first_name", "last_name", "email"}
+
+# models shown by the cached dataset and resource pages and the vector tiles
+CACHED_MODELS = (
+    "datasets.Dataset",
+    "datasets.Resource",
+    "datasets.MapResource",
+    "datasets.RasterResource",
+    "datasets.TabularResource",
+    "datasets.PartitionedResource",
+    "datasets.DataTable",
+    "datasets.DatasetContribution",
+    "datasets.DatasetRelationship",
+)
+
+
+def invalidate_cached_pages(sender, instance, **kwargs):
+    """
+    Bump the cache versions of the datasets and resources whose pages and API
+    responses show the saved or deleted object, and the version of the vector
+    tiles and coverage grids showing it.
+
+    **NOTE**: bulk queries do not send signals, their callers bump the
+    versions themselves.
+    """
+    if isinstance(instance, Dataset):
+        bump_versions(Dataset, [instance.pk, ALL_OBJECTS])
+        if not kwargs.get("created"):
+            # the pages of the related datasets show its title
+            relationships = DatasetRelationship.objects.filter(
+                Q(source=instance) | Q(target=instance)
+            ).values_list("source_id", "target_id")
+            bump_versions(Dataset, [pk for pair in relationships for pk in pair])
+            # resources show the embargo of their dataset, and are filtered by
+            # its project
+            bump_versions(
+                Resource,
+                [*instance.resources.values_list("pk", flat=True), ALL_OBJECTS],
+            )
+    elif isinstance(instance, Resource):
+        bump_versions(Resource, [instance.pk])
+        bump_versions(Dataset, [instance.dataset_id, instance.initial_value("dataset")])
+        # created, deleted, or a field of the tiles changed
+        if kwargs.get("created", True) or any(
+            instance.has_changed(field) for field in RESOURCE_TILE_FIELDS
+        ):
+            # data tables are bulk created along with the resource extent
+            bump_versions(Resource, [ALL_OBJECTS])
+            bump_versions(DataTable, [ALL_OBJECTS])
+    elif isinstance(instance, DataTable):
+        bump_versions(Resource, [instance.resource_id])
+        bump_versions(DataTable, [ALL_OBJECTS])
+    elif isinstance(instance, DatasetContribution):
+        bump_versions(Dataset, [instance.dataset_id])
+    elif isinstance(instance, DatasetRelationship):
+        bump_versions(Dataset, [instance.source_id, instance.target_id])
+
+
+def invalidate_contributor_pages(
+    sender, instance, created=False, update_fields=None, **kwargs
+):
+    """
+    Bump the cache versions of the datasets showing the name and email of a
+    saved user among their contributors.
+    """
+    # e.g. not when only last_login is updated
+    if created or (update_fields and not update_fields & CONTRIBUTOR_FIELDS):
+        return
+    bump_versions(
+        Dataset,
+        DatasetContribution.objects.filter(user=instance).values_list(
+            "dataset_id", flat=True
+        ),
+    )
+
+
+def invalidate_tagged(sender, instance, action, **kwargs):
+    """Invalidate the cache of a dataset or resource whose tags changed."""
+    if action.startswith("post_") and isinstance(instance, (Dataset, Resource)):
+        invalidate_cached_pages(sender, instance)
@@ -6,3 +6,64 @@ class DatasetsConf(AppConf):
     TITILER_URL = "/titiler"
     NINA_MAP_PREVIEW = None
     DUCKUI_URL = "/duckui/"
+
+    # metadata inference jobs
+    METADATA_CONCURRENCY = 8
+    METADATA_HOST_CONCURRENCY = 2
+    METADATA_DISPATCH_CHUNK_SIZE = 500
+    # priorities of the metadata jobs, higher first: refreshes requested by
+    # users, then new resources and changed uris, then the sweep (0)
+    METADATA_USER_PRIORITY = 10
+    METADATA_NEW_PRIORITY = 5
+    # seconds between the sweeps of a resource: halved when its object changed,
+    # doubled when it did not, within the min and max intervals
+    METADATA_MIN_INTERVAL = 60 * 60
+    METADATA_MAX_INTERVAL = 24 * 60 * 60
+    # failed inferences are retried with exponential backoff up to this interval
+    METADATA_FAILURE_MAX_INTERVAL = 7 * 24 * 60 * 60
+    # bytes of the blocks of remote objects kept by the GDAL process of a worker
+    # thread for all its jobs, least recently used blocks are evicted first.
+    # GDAL reads it once per process, see libs.gdal_process
+    METADATA_GDAL_CACHE_SIZE = 256 * 1024 * 1024
+    # GDAL configuration options of each metadata inference, see
+    # https://gdal.org/en/stable/user/configoptions.html
+    METADATA_GDAL_CONFIG = {
+        # do not write auxiliary files, e.g. the statistics of remote rasters
+        "GDAL_PAM_ENABLED": "NO",
+        # read the headers with the first request
+        "GDAL_INGESTED_BYTES_AT_OPEN": "65536",
+        # do not list the remote directory looking for sidecar files
+        "GDAL_DISABLE_READDIR_ON_OPEN": "TRUE",
+        "GDAL_HTTP_MERGE_CONSECUTIVE_RANGES": "YES",
+        "GDAL_HTTP_VERSION": "2TLS",
+        "GDAL_HTTP_MULTIPLEX": "YES",
+        # abort transfers stalled under 1 kB/s for 30 seconds
+        "GDAL_HTTP_LOW_SPEED_LIMIT": "1024",
+        "GDAL_HTTP_LOW_SPEED_TIME": "30",
+    }
+    # endpoint GDAL reads the objects of our S3 bucket from, e.g. the address
+    # of the S3 service inside the cluster, defaults to AWS_S3_ENDPOINT_URL
+    METADATA_S3_ENDPOINT_URL = None
+    # budgets of the inference of a resource, in seconds and bytes: over budget
+    # the inference falls back to cheaper passes (no statistics, first layer
+    # only), which have DATASETS_METADATA_FALLBACK_TIME_BUDGET seconds
+    METADATA_TIME_BUDGET = 120
+    METADATA_FALLBACK_TIME_BUDGET = 30
+    METADATA_BYTE_BUDGET = 512 * 1024 * 1024
+
+    # maximum number of resources per request of the bulk endpoints
+    BULK_MAX_ITEMS = 1000
+
+    # seconds to wait before recomputing the extent of an updated dataset
+    EXTENT_DEBOUNCE = 60
+    # degrees added around the extents of a single point or an axis-aligned line
+    EXTENT_PADDING = 0.00001
+
+    # relationship graph traversal
+    RELATIONSHIP_GRAPH_DEPTH = 2
+    RELATIONSHIP_GRAPH_MAX_DEPTH = 5
+    RELATIONSHIP_GRAPH_NODE_LIMIT = 500
+
+    # days the change feed is kept, older change tokens have to resync
+    CHANGES_RETENTION_DAYS = 90
+    CHANGES_PAGE_SIZE = 500
@@ -1,7 +1,7 @@
 import django_filters as filters
 from dal import autocomplete
-from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
-from django.db.models import Q
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Q
 from leaflet.forms.widgets import LeafletWidget
 from taggit.models import Tag
 
@@ -9,6 +9,8 @@ from dms.projects.models import Project
 from dms.users.models import User
 
 from . import models
+from .libs.search import SEARCH_CONFIG
+from .rules import dataset_in_user_projects_q, resource_in_user_projects_q
 
 
 class DatasetFilter(filters.FilterSet):
@@ -46,6 +48,8 @@ class DatasetFilter(filters.FilterSet):
         method="filter_tags",
     )
 
+    editable = filters.BooleanFilter(label="Editable by me", method="filter_editable")
+
     def filter_extent(self, queryset, name, value):
         try:
             geom = self.form.cleaned_data.get("extent")
@@ -70,14 +74,10 @@ class DatasetFilter(filters.FilterSet):
     def search_fulltext(self, queryset, field_name, value):
         if not value:
             return queryset
+        query = SearchQuery(value, search_type="websearch", config=SEARCH_CONFIG)
         return (
-            queryset.annotate(
-                rank=SearchRank(
-                    SearchVector("title", "name", "metadata"),
-                    SearchQuery(value, search_type="websearch"),
-                )
-            )
-            .filter(rank__gt=0.01)
+            queryset.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
             .order_by("-rank")
         )
 
@@ -86,6 +86,10 @@ class DatasetFilter(filters.FilterSet):
             return queryset.filter(tags__name__in=value).distinct()
         return queryset
 
+    def filter_editable(self, queryset, name, value):
+        q = dataset_in_user_projects_q(self.request.user)
+        return queryset.filter(q) if value else queryset.exclude(q)
+
     class Meta:
         model = models.Dataset
         fields = {"project": ["exact"], "version": ["exact"]}
@@ -128,17 +132,21 @@ class ResourceFilter(filters.FilterSet):
         ),
     )
 
+    tags = filters.ModelMultipleChoiceFilter(
+        queryset=Tag.objects.all(),
+        widget=autocomplete.ModelSelect2Multiple(url="autocomplete:tag"),
+        method="filter_tags",
+    )
+
+    editable = filters.BooleanFilter(label="Editable by me", method="filter_editable")
+
     def search_fulltext(self, queryset, field_name, value):
         if not value:
             return queryset
+        query = SearchQuery(value, search_type="websearch", config=SEARCH_CONFIG)
         return (
-            queryset.annotate(
-                rank=SearchRank(
-                    SearchVector("title", "description"),
-                    SearchQuery(value, search_type="websearch"),
-                )
-            )
-            .filter(rank__gt=0.01)
+            queryset.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
             .order_by("-rank")
         )
 
@@ -153,6 +161,11 @@ class ResourceFilter(filters.FilterSet):
 
         return queryset.filter(extent__intersects=geom)
 
+    def filter_tags(self, queryset, name, value):
+        if value:
+            return queryset.filter(tags__name__in=value).distinct()
+        return queryset
+
     def filter_by_resource_type(self, queryset, name, value):
         if value:
             if value == "resource":
@@ -172,6 +185,10 @@ class ResourceFilter(filters.FilterSet):
             return queryset.filter(dataset__project=value)
         return queryset
 
+    def filter_editable(self, queryset, name, value):
+        q = resource_in_user_projects_q(self.request.user)
+        return queryset.filter(q) if value else queryset.exclude(q)
+
     class Meta:
         model = models.Resource
         fields = {
@@ -192,14 +209,10 @@ class ResourceRestFilter(ResourceFilter):
     def search_fulltext(self, queryset, field_name, value):
         if not value:
             return queryset
+        query = SearchQuery(value, search_type="websearch", config=SEARCH_CONFIG)
         return (
-            queryset.annotate(
-                rank=SearchRank(
-                    SearchVector("title", "description"),
-                    SearchQuery(value, search_type="websearch"),
-                )
-            )
-            .filter(rank__gt=0.01)
+            queryset.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
             .order_by("-rank")
         )
 
@@ -213,7 +226,7 @@ class ResourceRestFilter(ResourceFilter):
 
     def filter_accessible_resources(self, queryset, name, value):
         if value:
-            return queryset.filter(last_sync__status="ok")
+            return queryset.filter(last_sync__status__in=["ok", "not modified"])
         return queryset
 
     class Meta(ResourceFilter.Meta):
@@ -248,14 +261,20 @@ class DataTableFilter(filters.FilterSet):
     def search_fulltext(self, queryset, field_name, value):
         if not value:
             return queryset
+        query = SearchQuery(value, search_type="websearch", config=SEARCH_CONFIG)
+        # both sides of the OR on the data table columns, so both GIN indexes
+        # are used instead of scanning the join
+        matching_resources = models.Resource.objects.filter(search_vector=query).values(
+            "pk"
+        )
         return (
-            queryset.annotate(
-                rank=SearchRank(
-                    SearchVector("resource__title", "resource__description", "name"),
-                    SearchQuery(value, search_type="websearch"),
-                )
+            queryset.filter(
+                Q(search_vector=query) | Q(resource_id__in=matching_resources)
+            )
+            .annotate(
+                rank=SearchRank(F("search_vector"), query)
+                + SearchRank(F("resource__search_vector"), query)
             )
-            .filter(rank__gt=0.01)
             .order_by("-rank")
         )
 
@@ -268,7 +287,9 @@ class DataTableFilter(filters.FilterSet):
 
     def filter_accessible_resources(self, queryset, name, value):
         if value:
-            return queryset.filter(resource__last_sync__status="ok")
+            return queryset.filter(
+                resource__last_sync__status__in=["ok", "not modified"]
+            )
         return queryset
 
     class Meta:
@@ -277,3 +298,12 @@ class DataTableFilter(filters.FilterSet):
             "resource",
             "name",
         )
+
+
+class ChangeFilter(filters.FilterSet):
+    entity = filters.MultipleChoiceFilter(choices=models.Change.Entity.choices)
+    action = filters.MultipleChoiceFilter(choices=models.Change.Action.choices)
+
+    class Meta:
+        model = models.Change
+        fields = ("entity", "action")
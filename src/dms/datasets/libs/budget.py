@@ -0,0 +1,76 @@
+import math
+import time
+
+# samples read by GDAL for approximate statistics, see GDALSTAT_APPROX_NUMSAMPLES
+APPROX_STATS_SAMPLES = 2500
+
+# bytes per pixel of the GDAL data types
+DATA_TYPE_SIZES = {
+    "Byte": 1,
+    "Int8": 1,
+    "UInt16": 2,
+    "Int16": 2,
+    "Float16": 2,
+    "UInt32": 4,
+    "Int32": 4,
+    "Float32": 4,
+    "CInt16": 4,
+    "UInt64": 8,
+    "Int64": 8,
+    "Float64": 8,
+    "CInt32": 8,
+    "CFloat32": 8,
+    "CFloat64": 16,
+}
+
+
+class InferenceBudget:
+    """
+    Wall-clock budget of the GDAL passes of the metadata inference.
+
+    A pass still running once the budget is spent is stopped by terminating
+    its process (see libs.gdal_process). The HTTP requests of a pass time out
+    with the budget too, and are not retried. A pass that failed with an
+    exhausted budget is degraded to a cheaper one instead of failing the
+    inference.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.started_at = time.monotonic()
+
+    @property
+    def remaining(self) -> float:
+        return self.seconds - (time.monotonic() - self.started_at)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.remaining <= 0
+
+    def gdal_config(self) -> dict[str, str]:
+        """Return the GDAL configuration options of the HTTP requests."""
+        return {
+            "GDAL_HTTP_TIMEOUT": str(max(math.ceil(self.remaining), 1)),
+            "GDAL_HTTP_MAX_RETRY": "0",
+        }
+
+
+def estimate_stats_bytes(info: dict) -> int:
+    """
+    Estimate the uncompressed bytes read by GDAL to compute the approximate
+    statistics of a raster, from the output of `gdal raster info` without
+    statistics: for each band, the smallest overview with enough samples, or
+    the full resolution.
+    """
+    total = 0
+    width, height = info.get("size") or (0, 0)
+    for band in info.get("bands", []):
+        sizes = [(width, height)] + [
+            tuple(overview["size"]) for overview in band.get("overviews", [])
+        ]
+        pixels = min(
+            (w * h for w, h in sizes if w * h >= APPROX_STATS_SAMPLES),
+            default=width * height,
+        )
+        total += pixels * DATA_TYPE_SIZES.get(band.get("type"), 8)
+    return total
@@ -0,0 +1,81 @@
+"""
+GDAL process of the metadata inference.
+
+GDAL cannot be interrupted from Python, and libcurl timeouts only bound each
+HTTP request, so the GDAL passes of the inference run in a child process of
+the worker thread, which is terminated when a pass does not return in time.
+Otherwise the process is reused by the next passes, so the blocks of remote
+objects it caches are shared by the jobs of the thread.
+"""
+
+import multiprocessing
+import threading
+
+from osgeo import gdal  # type: ignore[import]
+
+_local = threading.local()
+
+
+class BudgetExceeded(Exception):
+    """A GDAL pass did not return within its time budget."""
+
+
+def _init_process(cache_size: int):
+    gdal.UseExceptions()
+    # GDAL sizes the cache of the blocks of remote objects once, when it
+    # installs its /vsicurl/ handlers at the first use of a virtual file system.
+    # The environment variable of the option takes precedence.
+    if not gdal.GetConfigOption("CPL_VSIL_CURL_CACHE_SIZE"):
+        gdal.SetConfigOption("CPL_VSIL_CURL_CACHE_SIZE", str(cache_size))
+
+
+def run(func, *args, timeout: float, cache_size: int):
+    """
+    Run func(*args) in the GDAL process of the current thread, started if
+    needed, and return its result. Exceptions raised by func are raised again.
+
+    Args:
+        func: a picklable function, e.g. run_algorithm
+        timeout (float): seconds func has to return
+        cache_size (int): bytes of the block cache of a new process
+
+    Raises:
+        BudgetExceeded: func did not return in time, the process is terminated
+    """
+    if timeout <= 0:
+        raise BudgetExceeded("no time left")
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = multiprocessing.get_context("spawn").Pool(
+            1, initializer=_init_process, initargs=(cache_size,)
+        )
+        _local.pool = pool
+    try:
+        return pool.apply_async(func, args).get(timeout)
+    except multiprocessing.TimeoutError:
+        pool.terminate()
+        _local.pool = None
+        raise BudgetExceeded(f"stopped after {timeout:.1f} seconds") from None
+
+
+def clear_cache(path: str):
+    """
+    Drop the blocks of a remote object cached by the GDAL process of the
+    current thread, if it is running.
+    """
+    pool = getattr(_local, "pool", None)
+    if pool is not None:
+        pool.apply(gdal.VSICurlPartialClearCache, (path,))
+
+
+def run_algorithm(config: dict[str, str], args: tuple, kwargs: dict):
+    """Run a GDAL algorithm with configuration options and return its output."""
+    with gdal.config_options(config):
+        with gdal.Run(*args, **kwargs) as alg:
+            return alg.Output()
+
+
+def first_layer_name(config: dict[str, str], path: str) -> str:
+    """Return the name of the first layer of a vector dataset."""
+    with gdal.config_options(config):
+        return gdal.OpenEx(path, gdal.OF_VECTOR).GetLayer(0).GetName()
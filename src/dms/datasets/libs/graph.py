@@ -0,0 +1,154 @@
+from dataclasses import dataclass
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import models
+from django.db.models import Case, F, OuterRef, Q, When
+
+from ..conf import settings
+from ..models import Dataset, DatasetRelationship
+
+# Walks the relationships in both directions from the seed dataset, keeping the
+# shortest distance of every reached dataset. The nodes are returned nearest
+# first, with the types of their outgoing relationships.
+GRAPH_NODES_SQL = """
+WITH RECURSIVE edges(from_id, to_id) AS (
+    SELECT source_id, target_id FROM {rel}
+    WHERE %(types)s::varchar[] IS NULL OR type = ANY(%(types)s::varchar[])
+    UNION ALL
+    SELECT target_id, source_id FROM {rel}
+    WHERE %(types)s::varchar[] IS NULL OR type = ANY(%(types)s::varchar[])
+),
+walk(id, depth) AS (
+    SELECT %(seed)s::varchar, 0
+    UNION
+    SELECT edges.to_id, walk.depth + 1
+    FROM walk JOIN edges ON edges.from_id = walk.id
+    WHERE walk.depth < %(depth)s
+),
+nodes AS (
+    SELECT id, MIN(depth) AS depth FROM walk GROUP BY id
+)
+SELECT
+    {dataset}.id,
+    {dataset}.title,
+    nodes.depth,
+    ARRAY(
+        SELECT DISTINCT type FROM {rel}
+        WHERE source_id = {dataset}.id ORDER BY type
+    ) AS relationship_types
+FROM nodes JOIN {dataset} ON {dataset}.id = nodes.id
+ORDER BY nodes.depth, {dataset}.id
+LIMIT %(limit)s
+"""
+
+
+@dataclass
+class RelationshipGraph:
+    nodes: list[Dataset]
+    edges: list[DatasetRelationship]
+    truncated: bool = False
+
+
+def relationship_graph(
+    dataset_id: str,
+    depth: int | None = None,
+    types: list[str] | None = None,
+    limit: int | None = None,
+) -> RelationshipGraph:
+    """
+    Return the datasets reachable from a dataset through its relationships,
+    in either direction, and the relationships between them.
+
+    The traversal is a recursive CTE, so the whole graph is loaded with two
+    queries, one for the nodes and one for the edges.
+
+    Args:
+        dataset_id (str): id of the seed dataset
+        depth (int): maximum number of hops from the seed dataset,
+            capped by DATASETS_RELATIONSHIP_GRAPH_MAX_DEPTH
+        types (list[str]): only follow relationships of these types
+        limit (int): maximum number of nodes, the nearest are kept,
+            capped by DATASETS_RELATIONSHIP_GRAPH_NODE_LIMIT
+
+    Returns:
+        graph (RelationshipGraph): nodes are datasets annotated with depth and
+            relationship_types, truncated is set if the limit was reached
+    """
+    if depth is None:
+        depth = settings.DATASETS_RELATIONSHIP_GRAPH_DEPTH
+    depth = max(0, min(depth, settings.DATASETS_RELATIONSHIP_GRAPH_MAX_DEPTH))
+    max_limit = settings.DATASETS_RELATIONSHIP_GRAPH_NODE_LIMIT
+    limit = max(1, min(limit or max_limit, max_limit))
+
+    sql = GRAPH_NODES_SQL.format(
+        rel=DatasetRelationship._meta.db_table,
+        dataset=Dataset._meta.db_table,
+    )
+    nodes = list(
+        Dataset.objects.raw(
+            sql,
+            {
+                "seed": dataset_id,
+                "depth": depth,
+                "types": list(types) if types else None,
+                "limit": limit + 1,
+            },
+        )
+    )
+    truncated = len(nodes) > limit
+    nodes = nodes[:limit]
+
+    ids = [node.id for node in nodes]
+    edges = DatasetRelationship.objects.filter(source_id__in=ids, target_id__in=ids)
+    if types:
+        edges = edges.filter(type__in=types)
+
+    return RelationshipGraph(
+        nodes=nodes,
+        edges=list(edges.order_by("source_id", "target_id", "type")),
+        truncated=truncated,
+    )
+
+
+class SubqueryCount(models.Subquery):
+    template = "(SELECT count(*) FROM (%(subquery)s) _count)"
+    output_field = models.IntegerField()
+
+
+def node_annotations(ref: str, prefix: str = "") -> dict:
+    """
+    Annotations of the dataset referenced by ref: its degree, the number of
+    relationships it is part of, and the types of its outgoing relationships.
+    """
+    rels = DatasetRelationship.objects.order_by()
+    involved = Q(source_id=OuterRef(ref)) | Q(target_id=OuterRef(ref))
+    return {
+        f"{prefix}degree": SubqueryCount(rels.filter(involved).values("uuid")),
+        f"{prefix}relationship_types": ArraySubquery(
+            rels.filter(source_id=OuterRef(ref))
+            .order_by("type")
+            .values("type")
+            .distinct()
+        ),
+    }
+
+
+def neighbourhood(dataset_id: str):
+    """
+    Return the relationships of a dataset, in either direction, annotated with
+    the dataset at the other end: neighbour_id, neighbour_title,
+    neighbour_degree and neighbour_relationship_types.
+    """
+    is_source = Q(source_id=dataset_id)
+    return (
+        DatasetRelationship.objects.filter(is_source | Q(target_id=dataset_id))
+        .annotate(
+            neighbour_id=Case(
+                When(is_source, then=F("target_id")), default=F("source_id")
+            ),
+            neighbour_title=Case(
+                When(is_source, then=F("target__title")), default=F("source__title")
+            ),
+        )
+        .annotate(**node_annotations("neighbour_id", prefix="neighbour_"))
+    )
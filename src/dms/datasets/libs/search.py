@@ -0,0 +1,32 @@
+from django.contrib.postgres.search import (
+    SearchConfig,
+    SearchVectorCombinable,
+    SearchVectorField,
+)
+from django.db.models import Func, JSONField, Value
+from django.db.models.functions import Coalesce
+
+# text search configuration used by the stored search vectors and the queries
+SEARCH_CONFIG = "english"
+
+
+class JSONSearchVector(SearchVectorCombinable, Func):
+    """
+    Weighted tsvector of the string values of a JSON document,
+    keys and non-string values are not indexed.
+
+    The expression is immutable, so it can be used in a GeneratedField.
+    """
+
+    function = "setweight"
+    output_field = SearchVectorField()
+
+    def __init__(self, expression, config=SEARCH_CONFIG, weight="D"):
+        vector = Func(
+            SearchConfig.from_parameter(config),
+            Coalesce(expression, Value("{}"), output_field=JSONField()),
+            Value('["string"]'),
+            function="jsonb_to_tsvector",
+            output_field=SearchVectorField(),
+        )
+        super().__init__(vector, Value(weight))
@@ -0,0 +1,41 @@
+"""
+Django management command ``compute_extents``
+"""
+
+from django.core.management.base import BaseCommand
+
+from dms.datasets.models import Dataset
+
+
+class Command(BaseCommand):
+    """
+    Recompute the spatial extent of datasets from the extents of their resources.
+    All the datasets are updated in a single statement.
+    """
+
+    help = "Recompute the spatial extent of datasets"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "datasets",
+            nargs="*",
+            metavar="DATASET_ID",
+            help="ids of the datasets to update, default: all the datasets",
+        )
+        parser.add_argument(
+            "--project",
+            "-p",
+            action="append",
+            default=[],
+            help="only update the datasets of this project (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        datasets = Dataset.objects.all()
+        if options["datasets"]:
+            datasets = datasets.filter(pk__in=options["datasets"])
+        if options["project"]:
+            datasets = datasets.filter(project__in=options["project"])
+
+        count = datasets.compute_extent()
+        self.stdout.write(self.style.SUCCESS(f"Updated the extent of {count} datasets"))
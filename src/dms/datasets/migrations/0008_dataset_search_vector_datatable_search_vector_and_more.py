@@ -0,0 +1,85 @@
+# Generated by Django 6.0.6 on 2026-10-18 09:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.fields.json
+from django.db import migrations, models
+
+import dms.datasets.libs.search
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datasets", "0007_resource_user_metadata_alter_resource_metadata"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataset",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.SearchVector(
+                    "title", config="english", weight="A"
+                )
+                + django.contrib.postgres.search.SearchVector(
+                    "name", config="english", weight="B"
+                )
+                + dms.datasets.libs.search.JSONSearchVector(
+                    django.db.models.fields.json.KeyTransform(
+                        "descriptions", "metadata"
+                    ),
+                    weight="B",
+                )
+                + dms.datasets.libs.search.JSONSearchVector("metadata", weight="C"),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="datatable",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.SearchVector(
+                    "name", config="english", weight="A"
+                )
+                + dms.datasets.libs.search.JSONSearchVector("fields", weight="C")
+                + dms.datasets.libs.search.JSONSearchVector("metadata", weight="D"),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="resource",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.SearchVector(
+                    "title", config="english", weight="A"
+                )
+                + django.contrib.postgres.search.SearchVector(
+                    "description", config="english", weight="B"
+                )
+                + dms.datasets.libs.search.JSONSearchVector("user_metadata", weight="C")
+                + dms.datasets.libs.search.JSONSearchVector("metadata", weight="D"),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dataset",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="dataset_search_vector_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="datatable",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="datatable_search_vector_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="resource",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="resource_search_vector_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.6 on 2026-10-18 10:02
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0003_trigram_extension_tag_name_trgm_idx"),
+        ("datasets", "0008_dataset_search_vector_datatable_search_vector_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="dataset",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name", "title"],
+                name="dataset_trgm_idx",
+                opclasses=["gin_trgm_ops", "gin_trgm_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 6.0.6 on 2026-10-18 10:02
+
+import django.db.models.functions.datetime
+import rules.contrib.models
+from django.db import migrations, models
+
+# Records a row of datasets_change for every insert, update and delete.
+# Arguments: entity, comma separated key columns joined with "__" into the
+# object id, comma separated columns ignored when comparing updated rows,
+# and "child" for the tables of Resource subclasses, whose changes are
+# updates of the parent resource.
+RECORD_CHANGE_FUNCTION = """
+CREATE OR REPLACE FUNCTION datasets_record_change() RETURNS trigger AS $$
+DECLARE
+    old_row jsonb := CASE WHEN TG_OP <> 'INSERT' THEN to_jsonb(OLD) END;
+    new_row jsonb := CASE WHEN TG_OP <> 'DELETE' THEN to_jsonb(NEW) END;
+    ignored text[] := string_to_array(TG_ARGV[2], ',');
+BEGIN
+    IF TG_OP = 'UPDATE' AND (old_row - ignored) = (new_row - ignored) THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO datasets_change (txid, changed_at, entity, object_id, action)
+    SELECT
+        pg_current_xact_id()::text::bigint,
+        now(),
+        TG_ARGV[0],
+        string_agg(coalesce(new_row, old_row) ->> key.col, '__' ORDER BY key.i),
+        CASE
+            WHEN TG_ARGV[3] = 'child' OR TG_OP = 'UPDATE' THEN 'updated'
+            WHEN TG_OP = 'INSERT' THEN 'created'
+            ELSE 'deleted'
+        END
+    FROM unnest(string_to_array(TG_ARGV[1], ',')) WITH ORDINALITY AS key(col, i);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# table, entity, key columns, ignored columns, child
+TRIGGERS = [
+    (
+        "datasets_dataset",
+        "dataset",
+        "id",
+        "last_modified_at,search_vector",
+        "",
+    ),
+    (
+        "datasets_resource",
+        "resource",
+        "id",
+        "last_modified_at,last_sync,search_vector",
+        "",
+    ),
+    ("datasets_mapresource", "resource", "resource_ptr_id", "", "child"),
+    ("datasets_rasterresource", "resource", "resource_ptr_id", "", "child"),
+    ("datasets_tabularresource", "resource", "resource_ptr_id", "", "child"),
+    ("datasets_partitionedresource", "resource", "resource_ptr_id", "", "child"),
+    ("datasets_datatable", "datatable", "resource_id,name", "search_vector", ""),
+    ("datasets_datasetrelationship", "relationship", "uuid", "", ""),
+]
+
+
+def create_triggers_sql():
+    return [RECORD_CHANGE_FUNCTION] + [
+        f"CREATE TRIGGER {table}_change AFTER INSERT OR UPDATE OR DELETE ON {table} "
+        "FOR EACH ROW EXECUTE FUNCTION "
+        f"datasets_record_change('{entity}', '{key}', '{ignored}', '{child}');"
+        for table, entity, key, ignored, child in TRIGGERS
+    ]
+
+
+def drop_triggers_sql():
+    return [
+        f"DROP TRIGGER IF EXISTS {table}_change ON {table};" for table, *_ in TRIGGERS
+    ] + ["DROP FUNCTION IF EXISTS datasets_record_change();"]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datasets", "0009_dataset_dataset_trgm_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Change",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("txid", models.BigIntegerField()),
+                (
+                    "changed_at",
+                    models.DateTimeField(
+                        db_default=django.db.models.functions.datetime.Now()
+                    ),
+                ),
+                (
+                    "entity",
+                    models.CharField(
+                        choices=[
+                            ("dataset", "Dataset"),
+                            ("resource", "Resource"),
+                            ("datatable", "Data table"),
+                            ("relationship", "Relationship"),
+                        ]
+                    ),
+                ),
+                ("object_id", models.CharField()),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("created", "Created"),
+                            ("updated", "Updated"),
+                            ("deleted", "Deleted"),
+                        ]
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["txid", "id"], name="change_feed_idx"),
+                    models.Index(fields=["changed_at"], name="change_changed_at_idx"),
+                ],
+            },
+            bases=(rules.contrib.models.RulesModelMixin, models.Model),
+        ),
+        migrations.RunSQL(sql=create_triggers_sql(), reverse_sql=drop_triggers_sql()),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.6 on 2026-10-18 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datasets", "0010_change"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BucketObject",
+            fields=[
+                (
+                    "key",
+                    models.CharField(primary_key=True, serialize=False),
+                ),
+                ("size", models.BigIntegerField()),
+                ("etag", models.CharField()),
+                ("last_modified", models.DateTimeField()),
+                ("scanned_at", models.DateTimeField()),
+            ],
+        ),
+    ]
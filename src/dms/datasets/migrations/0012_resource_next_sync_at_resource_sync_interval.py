@@ -0,0 +1,40 @@
+# Generated by Django 6.0.6 on 2026-10-18 15:03
+
+from django.db import migrations, models
+
+# The scheduling columns of the metadata sweep are not changes of the resource,
+# they are ignored by the change feed like last_sync (see migration 0010).
+RESOURCE_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS datasets_resource_change ON datasets_resource;
+CREATE TRIGGER datasets_resource_change AFTER INSERT OR UPDATE OR DELETE
+ON datasets_resource FOR EACH ROW EXECUTE FUNCTION
+datasets_record_change('resource', 'id', '{ignored}', '');
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datasets", "0011_bucketobject"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="resource",
+            name="next_sync_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="resource",
+            name="sync_interval",
+            field=models.DurationField(blank=True, null=True),
+        ),
+        migrations.RunSQL(
+            sql=RESOURCE_TRIGGER_SQL.format(
+                ignored="last_modified_at,last_sync,next_sync_at,sync_interval,"
+                "search_vector"
+            ),
+            reverse_sql=RESOURCE_TRIGGER_SQL.format(
+                ignored="last_modified_at,last_sync,search_vector"
+            ),
+        ),
+    ]
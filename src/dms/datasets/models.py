@@ -2,41 +2,235 @@ import json
 import re
 import traceback
 import uuid
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlparse
 
 import requests
 import rules
 from autoslug import AutoSlugField
 from django.contrib.gis.db import models as gis_models
+from django.contrib.gis.db.models import aggregates as gis_aggregates
+from django.contrib.gis.db.models import functions as gis_functions
 from django.contrib.gis.geos import GEOSGeometry, Polygon
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db import connection, models, transaction
+from django.db import connection, connections, models, transaction
 from django.urls import reverse
 from django.utils import timezone as tz
 from django.utils.functional import cached_property
+from django.utils.http import http_date
 from django.utils.timezone import now
 from django.utils.translation import gettext as _
 from django_jsonform.models.fields import ArrayField
 from django_jsonform.models.fields import JSONField as JSONBField
-from django_lifecycle import AFTER_SAVE, LifecycleModelMixin, hook
+from django_lifecycle import AFTER_DELETE, AFTER_SAVE, LifecycleModelMixin, hook
 from django_lifecycle.conditions import WhenFieldHasChanged
-from model_utils.managers import InheritanceManager
-from osgeo import gdal  # type: ignore[import]
+from model_utils.managers import InheritanceQuerySet
 from procrastinate.contrib.django import app
+from procrastinate.exceptions import AlreadyEnqueued
 from rules.contrib.models import RulesModel
 from taggit.managers import TaggableManager
 
 from dms.core.models import GenericStringTaggedItem
+from dms.shared.cache import ALL_OBJECTS, bump_versions
 
 from .conf import settings
 from .enums import RelationshipType
+from .libs import gdal_process
+from .libs.budget import InferenceBudget, estimate_stats_bytes
+from .libs.search import SEARCH_CONFIG, JSONSearchVector
 from .rules import (
     dataset_in_user_projects,
     resource_in_user_projects,
 )
 from .schemas import dataset_metadata
 
-gdal.UseExceptions()
+# HTTP headers used as validators of remote objects, and their metadata key
+HTTP_VALIDATORS = {
+    "Last-Modified": "last_modified",
+    "ETag": "etag",
+    "Content-Length": "content_length",
+}
+
+
+class Expand(gis_functions.GeomOutputGeoFunc):
+    function = "ST_Expand"
+
+
+def bbox_polygon(geometry):
+    """
+    Return the bounding box of a geometry expression as a polygon: the
+    envelope of a point or of an axis-aligned line is a point or a line, so
+    its empty sides are padded by DATASETS_EXTENT_PADDING degrees.
+    """
+    envelope = gis_functions.Envelope(geometry)
+
+    def padding(axis):
+        return models.Case(
+            models.When(
+                models.lookups.Exact(
+                    models.Func(
+                        envelope,
+                        function=f"ST_{axis}Min",
+                        output_field=models.FloatField(),
+                    ),
+                    models.Func(
+                        envelope,
+                        function=f"ST_{axis}Max",
+                        output_field=models.FloatField(),
+                    ),
+                ),
+                then=models.Value(settings.DATASETS_EXTENT_PADDING),
+            ),
+            default=models.Value(0.0),
+        )
+
+    return Expand(envelope, padding("X"), padding("Y"))
+
+
+class DatasetQuerySet(models.QuerySet):
+    def compute_extent(self):
+        """
+        Set the extent of every dataset in the queryset to the bounding box of
+        the extents of its resources, in a single UPDATE statement. The bulk
+        update sends no signal, so the cache versions of the datasets are
+        bumped here.
+
+        Returns:
+            count (int): the number of updated datasets
+        """
+        extents = (
+            Resource.objects.filter(dataset=models.OuterRef("pk"))
+            .exclude(extent=None)
+            .order_by()
+            .values("dataset")
+            .annotate(bbox=bbox_polygon(gis_aggregates.Collect("extent")))
+            .values("bbox")
+        )
+        pks = list(self.values_list("pk", flat=True))
+        # a bulk update does not set the auto_now fields
+        count = self.update(
+            extent=models.Subquery(extents),
+            last_modified_at=models.functions.Now(),
+        )
+        bump_versions(self.model, [*pks, ALL_OBJECTS])
+        return count
+
+
+def bucket_prefix():
+    """
+    Return the prefix of the uris of the objects in our S3 bucket
+    (AWS_STORAGE_BUCKET_NAME), followed by their key, or None when S3 is not
+    configured.
+    """
+    if not getattr(settings, "AWS_ACCESS_KEY_ID", None):
+        return None
+    return f"{settings.AWS_S3_ENDPOINT_URL}/{settings.AWS_STORAGE_BUCKET_NAME}/"
+
+
+def defer_compute_extent(dataset_id):
+    """
+    Schedule the recomputation of the extent of a dataset in
+    DATASETS_EXTENT_DEBOUNCE seconds, unless a job is already waiting.
+    """
+    try:
+        app.configure_task(
+            name="dms.datasets.tasks.compute_extent_task",
+            queueing_lock=f"compute_extent:{dataset_id}",
+            schedule_in={"seconds": settings.DATASETS_EXTENT_DEBOUNCE},
+        ).defer(dataset_id=dataset_id)
+    except AlreadyEnqueued:
+        pass
+
+
+class ResourceQuerySet(InheritanceQuerySet):
+    def with_embargo(self):
+        """
+        Annotate dataset_under_embargo, the SQL counterpart of
+        Dataset.under_embargo, so lists do not need to load the datasets.
+        """
+        today = tz.localtime(tz.now()).date()
+        return self.annotate(
+            dataset_under_embargo=models.ExpressionWrapper(
+                models.Q(
+                    dataset__embargo_end_date__isnull=False,
+                    dataset__embargo_end_date__gt=today,
+                ),
+                output_field=models.BooleanField(),
+            )
+        )
+
+    def for_listing(self, *subclasses):
+        """
+        Queryset shared by the resource lists of the API and the frontend:
+        subclasses, dataset and project are fetched with the resources
+        and the embargo status is annotated.
+        """
+        return (
+            self.select_subclasses(*subclasses)
+            .select_related("dataset__project")
+            .with_embargo()
+        )
+
+    def bulk_create_resources(self, objs, batch_size=None):
+        """
+        Insert resources of the queryset model with bulk inserts.
+
+        Django cannot bulk_create multi-table inherited models, so the rows of
+        a Resource subclass are inserted in the resource table first with
+        bulk_create, and then in the table of the subclass with an INSERT of
+        its local columns: Django has no public API to insert the rows of a
+        child model alone. Like bulk_create, lifecycle hooks are not run: the
+        caller schedules the metadata inference.
+
+        Returns:
+            objs (list): the inserted resources
+        """
+        objs = list(objs)
+        parent_link = self.model._meta.get_ancestor_link(Resource)
+        if parent_link is None:
+            return self.bulk_create(objs, batch_size=batch_size)
+
+        fields = [f for f in self.model._meta.local_concrete_fields if not f.generated]
+        parents = []
+        for obj in objs:
+            setattr(obj, parent_link.attname, obj.id)
+            parents.append(
+                Resource(
+                    **{
+                        f.attname: getattr(obj, f.attname)
+                        for f in Resource._meta.concrete_fields
+                        if not f.generated
+                    }
+                )
+            )
+
+        db = connections[self.db]
+        sql = "INSERT INTO {} ({}) VALUES ({})".format(  # noqa: S608
+            db.ops.quote_name(self.model._meta.db_table),
+            ", ".join(db.ops.quote_name(f.column) for f in fields),
+            ", ".join(["%s"] * len(fields)),
+        )
+        with transaction.atomic(using=self.db, savepoint=False):
+            Resource.objects.using(self.db).bulk_create(parents, batch_size=batch_size)
+            with db.cursor() as cursor:
+                cursor.executemany(
+                    sql,
+                    [
+                        [
+                            f.get_db_prep_save(getattr(obj, f.attname), connection=db)
+                            for f in fields
+                        ]
+                        for obj in objs
+                    ],
+                )
+
+        for obj, parent in zip(objs, parents, strict=True):
+            obj.created_at = parent.created_at
+            obj.last_modified_at = parent.last_modified_at
+            obj._state.adding = False
+            obj._state.db = self.db
+        return objs
 
 
 class Dataset(RulesModel):
@@ -74,6 +268,19 @@ class Dataset(RulesModel):
         verbose_name="Spatial Extent",
     )
 
+    search_vector = models.GeneratedField(
+        expression=SearchVector("title", config=SEARCH_CONFIG, weight="A")
+        + SearchVector("name", config=SEARCH_CONFIG, weight="B")
+        + JSONSearchVector(
+            models.fields.json.KeyTransform("descriptions", "metadata"), weight="B"
+        )
+        + JSONSearchVector("metadata", weight="C"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = DatasetQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
@@ -110,19 +317,11 @@ class Dataset(RulesModel):
 
     def compute_extent(self):
         """
-        Compute the union of the extents of all resources and update the dataset extent.
+        Compute the bounding box of the extents of all resources and update the
+        dataset extent.
         """
-        self.extent = None
-        for r in self.resources.exclude(extent=None):
-            if self.extent:
-                self.extent = self.extent.union(r.extent)
-            else:
-                self.extent = r.extent
-
-        if self.extent:
-            self.extent = Polygon.from_bbox(self.extent.extent)
-
-        self.save(update_fields=["extent"])
+        Dataset.objects.filter(pk=self.pk).compute_extent()
+        self.refresh_from_db(fields=["extent", "last_modified_at"])
 
     @cached_property
     def under_embargo(self):
@@ -132,6 +331,14 @@ class Dataset(RulesModel):
         )
 
     class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="dataset_search_vector_idx"),
+            GinIndex(
+                fields=["name", "title"],
+                name="dataset_trgm_idx",
+                opclasses=["gin_trgm_ops", "gin_trgm_ops"],
+            ),
+        ]
         rules_permissions = {
             "add": rules.is_authenticated,
             "view": rules.always_allow,
@@ -259,11 +466,14 @@ class Resource(LifecycleModelMixin, RulesModel):
     )
 
     last_sync = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    # when the metadata sweep checks the resource next, see tasks.next_sync_interval
+    next_sync_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    sync_interval = models.DurationField(null=True, blank=True)
     is_metadata_manual = models.BooleanField(
         default=False,
     )
 
-    objects = InheritanceManager()
+    objects = ResourceQuerySet.as_manager()
     tags = TaggableManager(through=GenericStringTaggedItem, blank=True)
 
     extent = gis_models.GeometryField(null=True, blank=True)
@@ -271,7 +481,19 @@ class Resource(LifecycleModelMixin, RulesModel):
     #     null=True, blank=True, help_text="URL to the xml file holding the metadata"
     # )
 
+    search_vector = models.GeneratedField(
+        expression=SearchVector("title", config=SEARCH_CONFIG, weight="A")
+        + SearchVector("description", config=SEARCH_CONFIG, weight="B")
+        + JSONSearchVector("user_metadata", weight="C")
+        + JSONSearchVector("metadata", weight="D"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
     class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="resource_search_vector_idx"),
+        ]
         rules_permissions = {
             "add": rules.is_authenticated,
             "view": rules.always_allow,
@@ -296,8 +518,48 @@ class Resource(LifecycleModelMixin, RulesModel):
     def type(self):
         return None
 
+    @property
+    def under_embargo(self):
+        if hasattr(self, "dataset_under_embargo"):
+            return self.dataset_under_embargo
+        return self.dataset.under_embargo
+
+    def _bucket_key(self):
+        """
+        Return the key of the object in our S3 bucket the uri points to, or
+        None for resources stored elsewhere.
+        """
+        prefix = bucket_prefix()
+        if prefix and self.uri.startswith(prefix):
+            return self.uri.removeprefix(prefix)
+        return None
+
+    def _get_object_headers(self, key):
+        """
+        Return the validators of an object of our S3 bucket from its metadata,
+        in the format of the HTTP headers.
+        """
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        from dms.core.helpers.s3client import s3client
+
+        try:
+            head = s3client.head_object(
+                Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key
+            )
+        except (BotoCoreError, ClientError):
+            return {}
+        return {
+            "etag": head["ETag"],
+            "last_modified": http_date(head["LastModified"].timestamp()),
+            "content_length": str(head["ContentLength"]),
+        }
+
     def _get_http_headers(self):
-        """Extract Last-Modified and ETag headers for HTTP resources."""
+        """Extract Last-Modified, ETag and Content-Length headers for HTTP resources."""
+        if key := self._bucket_key():
+            return self._get_object_headers(key)
+
         if not self.uri.startswith("http"):
             return {}
 
@@ -305,35 +567,178 @@ class Resource(LifecycleModelMixin, RulesModel):
             response = requests.head(self.uri, timeout=30)
             headers = {}
 
-            if "Last-Modified" in response.headers:
-                headers["last_modified"] = response.headers["Last-Modified"]
+            for header, key in HTTP_VALIDATORS.items():
+                if header in response.headers:
+                    headers[key] = response.headers[header]
 
             return headers
         except requests.RequestException:
             return {}
 
-    def infer_metadata(self, deferred=True):
+    def _is_not_modified(self, http_headers):
+        """
+        Compare the validators of the remote object with the ones stored by the
+        last successful sync. The ETag is preferred, otherwise both Last-Modified
+        and Content-Length must match.
+        """
+        if not http_headers or not self.metadata or not self.last_sync:
+            return False
+        if self.last_sync.get("status") not in ("ok", "not modified"):
+            return False
+
+        previous = self.metadata.get("http_headers") or {}
+        if http_headers.get("etag") and previous.get("etag"):
+            return http_headers["etag"] == previous["etag"]
+
+        return bool(http_headers.get("last_modified")) and all(
+            http_headers.get(key) == previous.get(key)
+            for key in ("last_modified", "content_length")
+        )
+
+    def _clear_remote_cache(self, http_headers):
+        """
+        Drop the blocks of the remote object cached by GDAL in the worker
+        thread (see libs.gdal_process), unless its validators show that it
+        did not change since the last successful sync.
+        """
+        if not self._is_not_modified(http_headers):
+            gdal_process.clear_cache(self._gdal_path())
+
+    def _gdal_path(self, vsicurl=True):
+        """
+        Return the path GDAL reads the resource from: objects of our S3 bucket
+        are read with /vsis3/, other HTTP objects with /vsicurl/ unless
+        vsicurl is False, which lets the drivers handle the URL.
+        """
+        if key := self._bucket_key():
+            return f"/vsis3/{settings.AWS_STORAGE_BUCKET_NAME}/{key}"
+        if vsicurl and self.uri.startswith("http"):
+            return f"/vsicurl/{self.uri}"
+        return self.uri
+
+    def _gdal_config(self, budget):
+        """
+        Return the GDAL configuration of the metadata inference within an
+        InferenceBudget, with the endpoint and credentials of our S3 bucket
+        for the objects stored in it.
+        """
+        config = {**settings.DATASETS_METADATA_GDAL_CONFIG, **budget.gdal_config()}
+        if self._bucket_key():
+            endpoint = urlparse(
+                settings.DATASETS_METADATA_S3_ENDPOINT_URL
+                or settings.AWS_S3_ENDPOINT_URL
+            )
+            config |= {
+                "AWS_S3_ENDPOINT": endpoint.netloc,
+                "AWS_HTTPS": "YES" if endpoint.scheme == "https" else "NO",
+                "AWS_VIRTUAL_HOSTING": "FALSE",
+                "AWS_ACCESS_KEY_ID": settings.AWS_ACCESS_KEY_ID,
+                "AWS_SECRET_ACCESS_KEY": settings.AWS_SECRET_ACCESS_KEY,
+                "AWS_REGION": settings.AWS_S3_REGION_NAME or "us-east-1",
+            }
+        return config
+
+    def _in_gdal_process(self, budget, func, *args):
+        """
+        Run a function of libs.gdal_process in the GDAL process of the
+        worker thread, which is terminated once the InferenceBudget is spent.
+        """
+        return gdal_process.run(
+            func,
+            *args,
+            timeout=budget.remaining,
+            cache_size=settings.DATASETS_METADATA_GDAL_CACHE_SIZE,
+        )
+
+    def _run_gdal(self, budget, *args, **kwargs):
+        """
+        Run a GDAL algorithm with the configuration of the metadata inference
+        and within an InferenceBudget, and return its output.
+        """
+        return self._in_gdal_process(
+            budget, gdal_process.run_algorithm, self._gdal_config(budget), args, kwargs
+        )
+
+    def _set_not_modified(self):
+        self.last_sync = {
+            "timestamp": now(),
+            "status": "not modified",
+            "warnings": self.last_sync.get("warnings", []),
+        }
+        self.save(update_fields=["last_sync", "last_modified_at"])
+
+    def _defer_infer_metadata(self, conditional=False, priority=0):
+        app.configure_task(
+            name="dms.datasets.tasks.infer_metadata_task", priority=priority
+        ).defer(resource_id=self.pk, conditional=conditional)
+
+    def infer_metadata(self, deferred=True, conditional=False, priority=0):
         """
         Infer the metadata of the resource. For generic resources this
         only checks if the uri supports HTTP protocol and in case extracts
         the http headers using the HEAD method.
+
+        Args:
+            deferred (bool): should the inference be executed in a deferred task?
+            conditional (bool): skip the inference if the remote object has not
+                changed since the last successful sync
+            priority (int): priority of the deferred job, higher runs first
         """
         if self.is_metadata_manual:
             return
 
         if deferred:
-            app.configure_task(name="dms.datasets.tasks.infer_metadata_task").defer(
-                resource_id=self.pk
-            )
+            self._defer_infer_metadata(conditional=conditional, priority=priority)
+            return
+
+        if not self.uri.startswith("http"):
+            # e.g. a DOI or a file, there is nothing to infer
+            self.last_sync = {
+                "status": "not started",
+                "timestamp": now(),
+                "error": "resource is not reachable",
+                "warnings": [],
+            }
+            self.save(update_fields=["last_sync", "last_modified_at"])
             return
 
         http_headers = self._get_http_headers()
+        if conditional and self._is_not_modified(http_headers):
+            self._set_not_modified()
+            return
+
         if http_headers:
             if not self.metadata:
                 self.metadata = {}
             self.metadata["http_headers"] = http_headers
             self.last_sync = {"timestamp": now(), "status": "ok"}
-            self.save(update_fields=["metadata", "last_sync"])
+            self.save(update_fields=["metadata", "last_sync", "last_modified_at"])
+        else:
+            # the HEAD request failed or returned none of the validators
+            self.last_sync = {
+                "status": "fail",
+                "timestamp": now(),
+                "error": "resource is not reachable",
+                "warnings": [],
+            }
+            self.save(update_fields=["last_sync", "last_modified_at"])
+
+    @hook(
+        AFTER_SAVE,
+        condition=WhenFieldHasChanged("extent", has_changed=True),
+        on_commit=True,
+    )
+    @hook(AFTER_DELETE, on_commit=True)
+    def mark_dataset_extent_outdated(self):
+        """
+        Schedule the recomputation of the dataset extent when the extent of a
+        resource changes or a resource is deleted.
+        The job runs after DATASETS_EXTENT_DEBOUNCE seconds and a dataset has at
+        most one job waiting, so bursts of updates result in a single recompute.
+
+        **NOTE**: this is triggered by LifecycleModelMixin after saving the model
+        """
+        defer_compute_extent(self.dataset_id)
 
     @hook(
         AFTER_SAVE,
@@ -346,7 +751,9 @@ class Resource(LifecycleModelMixin, RulesModel):
 
         **NOTE**: this is triggered by LifecycleModelMixin after saving the model
         """
-        self.__class__.objects.get_subclass(id=self.pk).infer_metadata()
+        self.__class__.objects.get_subclass(id=self.pk).infer_metadata(
+            priority=settings.DATASETS_METADATA_NEW_PRIORITY
+        )
 
     def get_edit_url(self):
         return reverse(
@@ -473,20 +880,21 @@ class RasterResource(Resource):
             )
         return settings.DATASETS_TITILER_URL + "/cog/preview/?" + urlencode(params)
 
-    def infer_metadata(self, deferred=True):
+    def infer_metadata(self, deferred=True, conditional=False, priority=0):
         """
         Infer the metadata of the resuurce using GDAL.
 
         Args:
             deferred (bool): should the inference be executed in a deferred task?
+            conditional (bool): skip GDAL if the remote object has not changed
+                since the last successful sync
+            priority (int): priority of the deferred job, higher runs first
         """
         if self.is_metadata_manual:
             return
 
         if deferred:
-            app.configure_task(name="dms.datasets.tasks.infer_metadata_task").defer(
-                resource_id=self.pk
-            )
+            self._defer_infer_metadata(conditional=conditional, priority=priority)
             return
 
         if not re.search(r"^https?://", self.uri):
@@ -497,38 +905,54 @@ class RasterResource(Resource):
                 "warnings": [],
             }
             self.metadata = {}
-            self.save(update_fields=["last_sync", "metadata"])
+            self.save(update_fields=["last_sync", "metadata", "last_modified_at"])
+            return
+
+        http_headers = self._get_http_headers()
+        if conditional and self._is_not_modified(http_headers):
+            self._set_not_modified()
             return
 
+        self._clear_remote_cache(http_headers)
+        uri = self._gdal_path()
+        budget = InferenceBudget(settings.DATASETS_METADATA_TIME_BUDGET)
+        warnings = []
         try:
-            # Disable permenent auxillary files to prevent GDAL
-            # creating a stats file with a remote resource
-            uri = f"/vsicurl/{self.uri}" if self.uri.startswith("http") else self.uri
-            with gdal.config_options({"GDAL_PAM_ENABLED": "NO"}):
-                with gdal.Run(
-                    "raster",
-                    "info",
-                    input=uri,
-                    approx_stats=True,
-                ) as alg:
-                    metadata = alg.Output()
-                    # Add HTTP headers to metadata if present
-                    http_headers = self._get_http_headers()
-                    if http_headers:
-                        metadata["http_headers"] = http_headers
-
-                    self.metadata = metadata
-                    self.last_sync = {"timestamp": now(), "status": "ok"}
-                    self.save(update_fields=["metadata", "last_sync"])
+            # the header first, then the statistics if they fit the budgets
+            metadata = self._run_gdal(budget, "raster", "info", input=uri)
+            estimate = estimate_stats_bytes(metadata)
+            if estimate > settings.DATASETS_METADATA_BYTE_BUDGET:
+                warnings.append(
+                    f"statistics skipped: about {estimate} bytes to read, "
+                    "over the byte budget"
+                )
+            else:
+                try:
+                    metadata = self._run_gdal(
+                        budget, "raster", "info", input=uri, approx_stats=True
+                    )
+                except Exception as e:
+                    if not budget.exhausted:
+                        raise
+                    warnings.append(f"statistics skipped: time budget exceeded, {e}")
         except Exception as e:
             self.last_sync = {
                 "status": "fail",
                 "timestamp": now(),
-                "error": str(e),
-                "warnings": [],
+                "error": f"time budget exceeded, {e}" if budget.exhausted else str(e),
+                "warnings": warnings,
             }
             self.metadata = {}
-            self.save(update_fields=["last_sync", "metadata"])
+            self.save(update_fields=["last_sync", "metadata", "last_modified_at"])
+            return
+
+        # Add HTTP headers to metadata if present
+        if http_headers:
+            metadata["http_headers"] = http_headers
+
+        self.metadata = metadata
+        self.last_sync = {"timestamp": now(), "status": "ok", "warnings": warnings}
+        self.save(update_fields=["metadata", "last_sync", "last_modified_at"])
 
     @hook(
         AFTER_SAVE,
@@ -542,10 +966,10 @@ class RasterResource(Resource):
             }
         try:
             self.extent = GEOSGeometry(json.dumps(self.metadata.get("wgs84Extent")))
-            self.save(update_fields=["extent"])
+            self.save(update_fields=["extent", "last_modified_at"])
         except Exception:
             self.last_sync["warnings"].append(traceback.format_exc())
-            self.save(update_fields=["last_sync"])
+            self.save(update_fields=["last_sync", "last_modified_at"])
 
     def get_edit_url(self):
         return reverse(
@@ -566,6 +990,19 @@ class DataTable(gis_models.Model):
     )
     extent = gis_models.GeometryField(null=True, blank=True)
 
+    search_vector = models.GeneratedField(
+        expression=SearchVector("name", config=SEARCH_CONFIG, weight="A")
+        + JSONSearchVector("fields", weight="C")
+        + JSONSearchVector("metadata", weight="D"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="datatable_search_vector_idx"),
+        ]
+
     @property
     def is_spatial(self):
         return self.extent is not None
@@ -584,20 +1021,21 @@ class TabularResource(Resource):
     def type(self):
         return "tabular"
 
-    def infer_metadata(self, deferred=True):
+    def infer_metadata(self, deferred=True, conditional=False, priority=0):
         """
         Infer the metadata of the resuurce using GDAL.
 
         Args:
             deferred (bool): should the inference be executed in a deferred task?
+            conditional (bool): skip GDAL if the remote object has not changed
+                since the last successful sync
+            priority (int): priority of the deferred job, higher runs first
         """
         if self.is_metadata_manual:
             return
 
         if deferred:
-            app.configure_task(name="dms.datasets.tasks.infer_metadata_task").defer(
-                resource_id=self.pk
-            )
+            self._defer_infer_metadata(conditional=conditional, priority=priority)
             return
 
         if not re.search(r"^https?://", self.uri):
@@ -608,41 +1046,76 @@ class TabularResource(Resource):
                 "warnings": [],
             }
             self.metadata = {}
-            self.save(update_fields=["last_sync", "metadata"])
+            self.save(update_fields=["last_sync", "metadata", "last_modified_at"])
+            return
+
+        http_headers = self._get_http_headers()
+        if conditional and self._is_not_modified(http_headers):
+            self._set_not_modified()
             return
 
+        self._clear_remote_cache(http_headers)
+        content_length = http_headers.get("content_length", "")
+        content_length = int(content_length) if content_length.isdigit() else 0
+        budget = InferenceBudget(settings.DATASETS_METADATA_TIME_BUDGET)
+        metadata = None
+        warnings = []
         try:
-            with gdal.Run(
-                "vector",
-                "info",
-                input=self.uri,
-            ) as alg:
-                metadata = alg.Output()
-
-                # Add HTTP headers to metadata if present
-                http_headers = self._get_http_headers()
-                if http_headers:
-                    metadata["http_headers"] = http_headers
-
-                self.metadata = metadata
-                self.last_sync = {"timestamp": now(), "status": "ok", "warnings": []}
-
-                self.save(
-                    update_fields=[
-                        "metadata",
-                        "last_sync",
-                    ]
+            if content_length > settings.DATASETS_METADATA_BYTE_BUDGET:
+                warnings.append(
+                    f"only the first layer was inferred: {content_length} bytes, "
+                    "over the byte budget"
                 )
+            else:
+                try:
+                    metadata = self._run_gdal(
+                        budget, "vector", "info", input=self._gdal_path(vsicurl=False)
+                    )
+                except Exception as e:
+                    if not budget.exhausted:
+                        raise
+                    warnings.append(
+                        f"only the first layer was inferred: time budget exceeded, {e}"
+                    )
+            if metadata is None:
+                metadata = self._infer_first_layer()
 
         except Exception as e:
             self.last_sync = {
                 "status": "fail",
                 "timestamp": now(),
                 "error": str(e),
-                "warnings": [],
+                "warnings": warnings,
             }
             self.metadata = {}
-            self.save(update_fields=["last_sync", "metadata"])
+            self.save(update_fields=["last_sync", "metadata", "last_modified_at"])
+            return
+
+        # Add HTTP headers to metadata if present
+        if http_headers:
+            metadata["http_headers"] = http_headers
+
+        self.metadata = metadata
+        self.last_sync = {"timestamp": now(), "status": "ok", "warnings": warnings}
+        self.save(
+            update_fields=[
+                "metadata",
+                "last_sync",
+                "last_modified_at",
+            ]
+        )
+
+    def _infer_first_layer(self):
+        """
+        Infer the metadata of the first layer only, the fallback of the
+        inferences over budget, with DATASETS_METADATA_FALLBACK_TIME_BUDGET.
+        """
+        budget = InferenceBudget(settings.DATASETS_METADATA_FALLBACK_TIME_BUDGET)
+        path = self._gdal_path(vsicurl=False)
+        layer = self._in_gdal_process(
+            budget, gdal_process.first_layer_name, self._gdal_config(budget), path
+        )
+        return self._run_gdal(budget, "vector", "info", input=path, layer=[layer])
 
     def get_edit_url(self):
         return reverse(
@@ -710,7 +1183,7 @@ class TabularResource(Resource):
             DataTable.objects.bulk_create(tables)
 
             self.extent = coverage
-            self.save(update_fields=["extent", "last_sync"])
+            self.save(update_fields=["extent", "last_sync", "last_modified_at"])
 
 
 class PartitionedResource(Resource):
@@ -735,3 +1208,60 @@ class PartitionedResource(Resource):
             "datasets:partitionedresource_update",
             kwargs={"dataset_pk": self.dataset_id, "pk": self.pk},
         )
+
+
+class Change(RulesModel):
+    """
+    Change feed of the catalogue.
+
+    Rows are written by database triggers on datasets, resources, data tables
+    and relationships (see migration 0010), so bulk updates and deletions are
+    recorded too. txid is the id of the writing transaction: changes are read
+    in (txid, id) order and only once every older transaction has finished.
+    """
+
+    class Entity(models.TextChoices):
+        DATASET = "dataset", "Dataset"
+        RESOURCE = "resource", "Resource"
+        DATATABLE = "datatable", "Data table"
+        RELATIONSHIP = "relationship", "Relationship"
+
+    class Action(models.TextChoices):
+        CREATED = "created", "Created"
+        UPDATED = "updated", "Updated"
+        DELETED = "deleted", "Deleted"
+
+    id = models.BigAutoField(primary_key=True)
+    txid = models.BigIntegerField()
+    changed_at = models.DateTimeField(db_default=models.functions.Now())
+    entity = models.CharField(choices=Entity)
+    object_id = models.CharField()
+    action = models.CharField(choices=Action)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["txid", "id"], name="change_feed_idx"),
+            models.Index(fields=["changed_at"], name="change_changed_at_idx"),
+        ]
+        rules_permissions = {
+            "view": rules.always_allow,
+        }
+
+    def __str__(self):
+        return f"{self.entity} {self.object_id} {self.action}"
+
+
+class BucketObject(models.Model):
+    """
+    Inventory of the objects of our S3 bucket under MEDIA_BASE_LOCATION,
+    refreshed by listing the bucket (see tasks.scan_bucket_inventory).
+    """
+
+    key = models.CharField(primary_key=True)
+    size = models.BigIntegerField()
+    etag = models.CharField()
+    last_modified = models.DateTimeField()
+    scanned_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.key
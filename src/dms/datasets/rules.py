@@ -1,6 +1,7 @@
 import rules
+from django.db.models import Q
 
-from dms.projects.models import Project
+from dms.projects.rules import get_project_roles
 
 
 @rules.predicate
@@ -11,7 +12,7 @@ def dataset_in_user_projects(user, dataset):
         return True
     if not dataset.project_id and user.is_staff:
         return True
-    return Project.objects.filter(members__user=user, datasets=dataset).exists()
+    return dataset.project_id in get_project_roles(user)
 
 
 @rules.predicate
@@ -22,8 +23,29 @@ def resource_in_user_projects(user, resource):
         return True
     if not resource.dataset.project_id and user.is_staff:
         return True
-    if resource.dataset.project:
-        return Project.objects.filter(
-            members__user=user, datasets=resource.dataset
-        ).exists()
-    return False
+    return resource.dataset.project_id in get_project_roles(user)
+
+
+def dataset_in_user_projects_q(user, prefix: str = "") -> Q:
+    """
+    Queryset counterpart of dataset_in_user_projects. Like user.has_perm,
+    active superusers are allowed every object.
+
+    Args:
+        user: the user to check
+        prefix (str): lookup path from the filtered model to the dataset
+    """
+    if not user.is_authenticated:
+        return Q(pk__in=[])
+    if user.is_active and user.is_superuser:
+        # not Q(): excluding an empty Q would keep every object
+        return ~Q(pk__in=[])
+    q = Q(**{f"{prefix}project__in": list(get_project_roles(user))})
+    if user.is_staff:
+        q |= Q(**{f"{prefix}project__isnull": True})
+    return q
+
+
+def resource_in_user_projects_q(user) -> Q:
+    """Queryset counterpart of resource_in_user_projects."""
+    return dataset_in_user_projects_q(user, prefix="dataset__")
@@ -44,7 +44,7 @@ class ResourceTable(tables.Table):
         return record.__class__.__name__
 
     def render_uri(self, value, record):
-        if record.dataset.under_embargo:
+        if record.under_embargo:
             return None
         if value and (value.startswith("http://") or value.startswith("https://")):
             return mark_safe(f'<a href="{value}" target="_blank">{value}</a>')  # noqa: S308
@@ -68,7 +68,7 @@ class ResourceListTable(ResourceTable):
     project = tables.Column(empty_values=(), orderable=False)
 
     def render_uri(self, value, record):
-        if record.dataset.under_embargo:
+        if record.under_embargo:
             return None
         if value and (value.startswith("http://") or value.startswith("https://")):
             return mark_safe(f'<a href="{value}" target="_blank">{value}</a>')  # noqa: S308
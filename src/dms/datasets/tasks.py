@@ -1,24 +1,335 @@
+import logging
+import zlib
+from collections import defaultdict
+from datetime import timedelta
+from urllib.parse import urlparse
+
 from django.db import close_old_connections
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import Substr
+from django.utils import timezone
+from procrastinate import exceptions
 from procrastinate.contrib.django import app
 
-from .models import Resource
+from dms.shared.cache import bump_versions
+
+from .conf import settings
+from .models import BucketObject, Change, Dataset, Resource, bucket_prefix
+
+logger = logging.getLogger(__name__)
+
+
+def metadata_lock(uri: str, index: int) -> str:
+    """
+    Return the procrastinate lock for the index-th job targeting the host of uri.
+
+    Jobs sharing a lock are executed one at a time, so spreading them over
+    DATASETS_METADATA_CONCURRENCY locks caps the global concurrency, while each
+    host only gets DATASETS_METADATA_HOST_CONCURRENCY of those locks.
+    """
+    slots = max(settings.DATASETS_METADATA_CONCURRENCY, 1)
+    host_slots = min(max(settings.DATASETS_METADATA_HOST_CONCURRENCY, 1), slots)
+    host = urlparse(uri).hostname or ""
+    offset = zlib.crc32(host.encode())
+    return f"infer_metadata:{(offset + index % host_slots) % slots}"
+
+
+# last_sync statuses of the inferences that failed or could not start
+FAILED_STATUSES = (None, "fail", "not started", "missing")
+
+
+def next_sync_interval(status, previous_status, interval) -> timedelta:
+    """
+    Return the interval before the next sweep of a resource whose inference
+    ended with status:
+
+    - failures are retried with exponential backoff, from
+      DATASETS_METADATA_MIN_INTERVAL up to DATASETS_METADATA_FAILURE_MAX_INTERVAL
+    - unchanged objects are checked twice as late, up to
+      DATASETS_METADATA_MAX_INTERVAL
+    - changed objects are checked twice as often, down to
+      DATASETS_METADATA_MIN_INTERVAL
+
+    so the interval follows how often the object actually changes.
+    """
+    min_interval = timedelta(seconds=settings.DATASETS_METADATA_MIN_INTERVAL)
+    interval = interval or min_interval
+    if status in FAILED_STATUSES:
+        if previous_status not in FAILED_STATUSES:
+            return min_interval
+        return min(
+            interval * 2,
+            timedelta(seconds=settings.DATASETS_METADATA_FAILURE_MAX_INTERVAL),
+        )
+    if status == "not modified":
+        return min(
+            interval * 2, timedelta(seconds=settings.DATASETS_METADATA_MAX_INTERVAL)
+        )
+    return max(interval / 2, min_interval)
+
+
+def schedule_next_sync(resource, previous_status, failed=False):
+    """
+    Set when the metadata sweep checks the resource next, as a failure if the
+    inference raised.
+    """
+    status = "fail" if failed else (resource.last_sync or {}).get("status")
+    interval = next_sync_interval(status, previous_status, resource.sync_interval)
+    Resource.objects.filter(pk=resource.pk).update(
+        next_sync_at=timezone.now() + interval, sync_interval=interval
+    )
 
 
 @app.task
-def infer_metadata_task(resource_id: str):
+def infer_metadata_task(resource_id: str, conditional: bool = False):
     close_old_connections()
+    resource = None
+    failed = True
     try:
         resource = Resource.objects.get_subclass(id=resource_id)
-        resource.infer_metadata(deferred=False)
+        previous_status = (resource.last_sync or {}).get("status")
+        resource.infer_metadata(deferred=False, conditional=conditional)
+        failed = False
     finally:
+        # failures are backed off too, or the sweep would retry them every time
+        if resource is not None:
+            schedule_next_sync(resource, previous_status, failed=failed)
         close_old_connections()
 
 
-@app.periodic(cron="0 * * * *")
 @app.task
-def update_metadata(timestamp: int):
+def compute_extent_task(dataset_id: str):
     close_old_connections()
-    resources = Resource.objects.select_subclasses().filter(is_metadata_manual=False)
+    try:
+        Dataset.objects.filter(pk=dataset_id).compute_extent()
+    finally:
+        close_old_connections()
+
+
+def dispatch_metadata_jobs(queryset) -> dict[str, int]:
+    """
+    Enqueue one infer_metadata_task per resource of the queryset.
+
+    Resources are read in chunks of DATASETS_METADATA_DISPATCH_CHUNK_SIZE ids,
+    a resource that already has a job waiting in the queue is skipped.
+    Jobs are conditional: unchanged remote objects are not inferred again.
+
+    Returns:
+        report (dict): number of dispatched, skipped and failed jobs
+    """
+    report = {"dispatched": 0, "skipped": 0, "failed": 0}
+    per_host = {}
+    last_id = None
+    queryset = queryset.order_by("id").values_list("id", "uri")
+
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        chunk = list(chunk[: settings.DATASETS_METADATA_DISPATCH_CHUNK_SIZE])
+        if not chunk:
+            break
+
+        for resource_id, uri in chunk:
+            host = urlparse(uri).hostname or ""
+            index = per_host.get(host, 0)
+            try:
+                infer_metadata_task.configure(
+                    lock=metadata_lock(uri, index),
+                    queueing_lock=f"infer_metadata:{resource_id}",
+                ).defer(resource_id=resource_id, conditional=True)
+            except exceptions.AlreadyEnqueued:
+                report["skipped"] += 1
+            except Exception:
+                logger.exception("Cannot dispatch metadata job for %s", resource_id)
+                report["failed"] += 1
+            else:
+                per_host[host] = index + 1
+                report["dispatched"] += 1
+
+        last_id = chunk[-1][0]
+        close_old_connections()
+
+    return report
+
+
+def defer_metadata_jobs(resources) -> int:
+    """
+    Enqueue infer_metadata_task for new or changed resources with a single
+    batch_defer per lock, instead of one defer per resource.
+
+    Resources with manual metadata are skipped, jobs are spread over the
+    locks of metadata_lock like dispatch_metadata_jobs.
+
+    Returns:
+        count (int): the number of enqueued jobs
+    """
+    batches = defaultdict(list)
+    per_host = {}
     for resource in resources:
-        resource.infer_metadata(deferred=False)
+        if resource.is_metadata_manual:
+            continue
+        host = urlparse(resource.uri).hostname or ""
+        index = per_host.get(host, 0)
+        per_host[host] = index + 1
+        batches[metadata_lock(resource.uri, index)].append({"resource_id": resource.pk})
+
+    for lock, jobs in batches.items():
+        infer_metadata_task.configure(
+            lock=lock, priority=settings.DATASETS_METADATA_NEW_PRIORITY
+        ).batch_defer(*jobs)
+    return sum(len(jobs) for jobs in batches.values())
+
+
+def bucket_location_prefix() -> str | None:
+    """
+    Return the prefix of the uris of the objects inventoried by
+    scan_bucket_inventory, or None when S3 is not configured.
+    """
+    prefix = bucket_prefix()
+    return prefix and f"{prefix}{settings.MEDIA_BASE_LOCATION}/"
+
+
+def flag_missing_objects(started_at) -> int:
+    """
+    Flag in last_sync the resources of objects missing from the inventory.
+
+    Returns:
+        count (int): the number of newly flagged resources
+    """
+    prefix = bucket_prefix()
+    missing = list(
+        Resource.objects.filter(uri__startswith=bucket_location_prefix())
+        .exclude(last_sync__status="missing")
+        .alias(key=Substr("uri", len(prefix) + 1))
+        .filter(~Exists(BucketObject.objects.filter(key=OuterRef("key"))))
+        .values_list("pk", flat=True)
+    )
+    if missing:
+        Resource.objects.filter(pk__in=missing).update(
+            last_sync={
+                "status": "missing",
+                "timestamp": started_at,
+                "error": "the object is missing from the bucket",
+                "warnings": [],
+            },
+            last_modified_at=timezone.now(),
+        )
+        bump_versions(Resource, missing)
+    return len(missing)
+
+
+def scan_bucket_inventory() -> dict[str, int]:
+    """
+    Refresh the inventory of the objects of our S3 bucket under
+    MEDIA_BASE_LOCATION with paginated ListObjectsV2 requests, of up to 1000
+    objects each, and diff it with the resources stored in the bucket:
+
+    - the resources of new or changed objects are dispatched for inference
+    - the resources of objects missing from the bucket are flagged in last_sync
+
+    Returns:
+        report (dict): number of listed, changed and removed objects, of
+            dispatched jobs and of newly missing resources
+    """
+    from dms.core.helpers.s3client import s3client
+
+    report = {"listed": 0, "changed": 0, "removed": 0, "dispatched": 0, "missing": 0}
+    prefix = bucket_prefix()
+    started_at = timezone.now()
+    pages = s3client.get_paginator("list_objects_v2").paginate(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Prefix=f"{settings.MEDIA_BASE_LOCATION}/",
+    )
+    for page in pages:
+        objects = [
+            BucketObject(
+                key=obj["Key"],
+                size=obj["Size"],
+                etag=obj["ETag"],
+                last_modified=obj["LastModified"],
+                scanned_at=started_at,
+            )
+            for obj in page.get("Contents", [])
+        ]
+        known = {
+            key: validators
+            for key, *validators in BucketObject.objects.filter(
+                key__in=[obj.key for obj in objects]
+            ).values_list("key", "size", "etag", "last_modified")
+        }
+        changed = [
+            obj.key
+            for obj in objects
+            if known.get(obj.key) != [obj.size, obj.etag, obj.last_modified]
+        ]
+        BucketObject.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=["key"],
+            update_fields=["size", "etag", "last_modified", "scanned_at"],
+        )
+        report["listed"] += len(objects)
+        report["changed"] += len(changed)
+        if changed:
+            jobs = dispatch_metadata_jobs(
+                Resource.objects.filter(
+                    is_metadata_manual=False, uri__in=[prefix + key for key in changed]
+                )
+            )
+            report["dispatched"] += jobs["dispatched"]
         close_old_connections()
+
+    # objects that were not listed have been deleted
+    report["removed"], _ = BucketObject.objects.filter(
+        scanned_at__lt=started_at
+    ).delete()
+    report["missing"] = flag_missing_objects(started_at)
+    return report
+
+
+@app.periodic(cron="45 * * * *")
+@app.task
+def scan_bucket(timestamp: int):
+    close_old_connections()
+    if not bucket_prefix():
+        return None
+    report = scan_bucket_inventory()
+    logger.info(
+        "Bucket scan: %(listed)s objects listed, %(changed)s changed, %(removed)s"
+        " removed, %(dispatched)s jobs dispatched, %(missing)s resources missing",
+        report,
+    )
+    return report
+
+
+@app.periodic(cron="*/15 * * * *")
+@app.task
+def update_metadata(timestamp: int):
+    close_old_connections()
+    # only the resources due, see next_sync_interval
+    resources = Resource.objects.filter(is_metadata_manual=False).filter(
+        Q(next_sync_at=None) | Q(next_sync_at__lte=timezone.now())
+    )
+    if location := bucket_location_prefix():
+        # the objects of our bucket are refreshed by scan_bucket once they
+        # were inferred, failures are retried here with their backoff
+        resources = resources.exclude(
+            uri__startswith=location,
+            last_sync__status__in=["ok", "not modified"],
+        )
+    report = dispatch_metadata_jobs(resources)
+    logger.info(
+        "Metadata sweep: %(dispatched)s dispatched, %(skipped)s skipped,"
+        " %(failed)s failed",
+        report,
+    )
+    return report
+
+
+@app.periodic(cron="30 3 * * *")
+@app.task
+def prune_changes(timestamp: int):
+    close_old_connections()
+    cutoff = timezone.now() - timedelta(days=settings.DATASETS_CHANGES_RETENTION_DAYS)
+    deleted, _ = Change.objects.filter(changed_at__lt=cutoff).delete()
+    logger.info("Pruned %s changes older than %s", deleted, cutoff)
+    return deleted
@@ -0,0 +1,169 @@
+from datetime import UTC, datetime
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Polygon
+from django.core.cache import cache
+from django.urls import reverse
+from taggit.models import Tag
+
+from dms.datasets.enums import RelationshipType
+from dms.datasets.models import (
+    Dataset,
+    DatasetContribution,
+    DatasetRelationship,
+    RasterResource,
+    Resource,
+)
+from dms.projects.models import Project
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_api_retrieve_cache(client, django_capture_on_commit_callbacks):
+    dataset = Dataset.objects.create(id="dataset", title="Dataset")
+    url = reverse("api_v1:datasets-detail", kwargs={"pk": dataset.pk})
+    assert client.get(url).json()["title"] == "Dataset"
+
+    # saved without committing, the cached response is still served
+    Dataset.objects.filter(pk=dataset.pk).update(title="Unseen")
+    assert client.get(url).json()["title"] == "Dataset"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        dataset.title = "Renamed"
+        dataset.save()
+    assert client.get(url).json()["title"] == "Renamed"
+
+
+@pytest.mark.django_db
+def test_dataset_page_cache(client, django_capture_on_commit_callbacks):
+    dataset = Dataset.objects.create(id="dataset", title="Dataset")
+    other = Dataset.objects.create(id="other", title="Other")
+    url = reverse("datasets:dataset_detail", kwargs={"pk": dataset.pk})
+    assert b"resource-title" not in client.get(url).content
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Resource.objects.create(
+            id="resource", title="resource-title", uri="test", dataset=dataset
+        )
+    assert b"resource-title" in client.get(url).content
+
+    with django_capture_on_commit_callbacks(execute=True):
+        DatasetRelationship.objects.create(
+            source=other, target=dataset, type=RelationshipType.CITES
+        )
+    assert reverse("datasets:dataset_detail", args=["other"]).encode() in (
+        client.get(url).content
+    )
+
+
+@pytest.mark.django_db
+def test_dataset_page_shows_related_changes(client, django_capture_on_commit_callbacks):
+    dataset = Dataset.objects.create(id="dataset", title="Dataset")
+    other = Dataset.objects.create(id="other", title="other-title")
+    user = get_user_model().objects.create_user(
+        username="contributor", first_name="Ada"
+    )
+    DatasetRelationship.objects.create(
+        source=other, target=dataset, type=RelationshipType.CITES
+    )
+    DatasetContribution.objects.create(dataset=dataset, user=user)
+    url = reverse("datasets:dataset_detail", kwargs={"pk": dataset.pk})
+    content = client.get(url).content
+    assert b"other-title" in content
+    assert b"Ada" in content
+
+    with django_capture_on_commit_callbacks(execute=True):
+        other.title = "renamed-title"
+        other.save()
+    assert b"renamed-title" in client.get(url).content
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.first_name = "Grace"
+        user.save()
+    assert b"Grace" in client.get(url).content
+
+
+@pytest.mark.django_db
+def test_compute_extent_view_invalidates_cache(
+    client, django_capture_on_commit_callbacks
+):
+    user = get_user_model().objects.create_user(username="staff", is_staff=True)
+    dataset = Dataset.objects.create(id="dataset", title="Dataset")
+    Resource.objects.create(
+        id="resource",
+        uri="test",
+        dataset=dataset,
+        extent=Polygon.from_bbox((0.2, 0.2, 0.8, 0.8)),
+    )
+    url = reverse("api_v1:datasets-geojson-feature", kwargs={"pk": dataset.pk})
+    coverage_url = reverse("api_v1:datasets-coverage")
+    assert client.get(url).json()["geometry"] is None
+    assert client.get(coverage_url, {"bbox": "0,0,1,1"}).json()["cells"] == []
+
+    client.force_login(user)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post(
+            reverse("datasets:dataset_compute_extent", kwargs={"pk": dataset.pk})
+        )
+    assert response.status_code == 302
+
+    # the cached responses of the anonymous user are renewed
+    client.logout()
+    assert client.get(url).json()["geometry"]["type"] == "Polygon"
+    cells = client.get(coverage_url, {"bbox": "0,0,1,1"}).json()["cells"]
+    assert [c["count"] for c in cells] == [1]
+
+
+@pytest.mark.django_db
+def test_resource_api_coverage(client, django_capture_on_commit_callbacks):
+    """Test the filters of the counts of the resource extents per grid cell."""
+    project = Project.objects.create(
+        number="P001", name="Project", start_date="2023-01-01T00:00:00Z"
+    )
+    dataset = Dataset.objects.create(id="dataset", title="Dataset", project=project)
+    other = Dataset.objects.create(id="other", title="Other")
+    raster = RasterResource.objects.create(
+        id="raster",
+        uri="test",
+        dataset=dataset,
+        extent=Polygon.from_bbox((10.2, 60.2, 10.4, 60.4)),
+    )
+    raster.tags.add("forest")
+    Resource.objects.create(
+        id="old",
+        uri="test",
+        dataset=other,
+        extent=Polygon.from_bbox((11.2, 60.2, 11.4, 60.4)),
+    )
+    Resource.objects.filter(id="old").update(
+        created_at=datetime(2020, 1, 1, tzinfo=UTC)
+    )
+    url = reverse("api_v1:resources-coverage")
+
+    def counts(**params):
+        response = client.get(url, {"bbox": "10,60,12,61", **params})
+        assert response.status_code == 200
+        return {(c["i"], c["j"]): c["count"] for c in response.json()["cells"]}
+
+    assert counts() == {(10, 60): 1, (11, 60): 1}
+    assert counts(dataset__project=project.pk) == {(10, 60): 1}
+    tag = Tag.objects.get(name="forest")
+    assert counts(tags=tag.pk) == {(10, 60): 1}
+    assert counts(resource_type="rasterresource") == {(10, 60): 1}
+    assert counts(resource_type="resource") == {(11, 60): 1}
+    assert counts(created_after="2021-01-01T00:00:00Z") == {(10, 60): 1}
+    assert counts(created_before="2021-01-01T00:00:00Z") == {(11, 60): 1}
+
+    # the cached grid is renewed when an extent changes
+    with django_capture_on_commit_callbacks(execute=True):
+        raster.extent = Polygon.from_bbox((11.6, 60.6, 11.8, 60.8))
+        raster.save()
+    assert counts() == {(11, 60): 2}
@@ -0,0 +1,56 @@
+import pytest
+from django.urls import reverse
+
+from dms.datasets.models import Change, Dataset, Resource
+
+
+def read_feed(client, token=None, **params):
+    if token:
+        params["since"] = token
+    response = client.get(reverse("api_v1:changes-list"), params)
+    assert response.status_code == 200
+    data = response.json()
+    changes = [(c["entity"], c["object_id"], c["action"]) for c in data["results"]]
+    return changes, data["next_token"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_change_feed(client):
+    dataset = Dataset.objects.create(id="dataset", title="Dataset")
+    resource = Resource.objects.create(
+        id="resource", title="Resource", uri="test", dataset=dataset
+    )
+    changes, token = read_feed(client)
+    assert changes == [
+        ("dataset", "dataset", "created"),
+        ("resource", "resource", "created"),
+    ]
+
+    # only the sync status changed, not recorded
+    Resource.objects.filter(pk=resource.pk).update(last_sync={"status": "ok"})
+    dataset.title = "Renamed"
+    dataset.save()
+    resource.delete()
+
+    changes, token = read_feed(client, token)
+    assert changes == [
+        ("dataset", "dataset", "updated"),
+        ("resource", "resource", "deleted"),
+    ]
+    assert read_feed(client, token) == ([], token)
+
+    changes, _ = read_feed(client, entity="resource", action="deleted")
+    assert changes == [("resource", "resource", "deleted")]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_change_feed_expired_token(client):
+    Dataset.objects.create(id="dataset", title="Dataset")
+    _, token = read_feed(client)
+    Change.objects.all().delete()
+
+    response = client.get(reverse("api_v1:changes-list"), {"since": token})
+    assert response.status_code == 410
+
+    response = client.get(reverse("api_v1:changes-list"), {"since": "invalid"})
+    assert response.status_code == 400
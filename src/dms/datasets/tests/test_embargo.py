@@ -1,11 +1,14 @@
 from datetime import date, timedelta
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
 from rest_framework.test import APIRequestFactory
 
 from dms.datasets.api.serializers import ResourceListSerializer, ResourceSerializer
-from dms.datasets.models import Dataset, TabularResource
+from dms.datasets.models import Dataset, Resource, TabularResource
 from dms.projects.models import Project
 
 
@@ -139,3 +142,45 @@ class TestEmbargoUriHiding:
             resource_with_embargo, context={"request": request}
         )
         assert serializer.data["uri"] is None
+
+
+@pytest.mark.django_db
+def test_resource_queryset_annotates_embargo(
+    resource_no_embargo, resource_with_embargo, resource_embargo_expired
+):
+    """The embargo annotation should match Dataset.under_embargo."""
+    resources = Resource.objects.with_embargo()
+    assert {r.pk: bool(r.under_embargo) for r in resources} == {
+        "res-no-embargo": False,
+        "res-with-embargo": True,
+        "res-embargo-expired": False,
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url_name", ["api_v1:resources-list", "datasets:resource_list"]
+)
+def test_resource_list_query_count_is_constant(
+    client, url_name, dataset_no_embargo, dataset_with_embargo
+):
+    """Listing resources should not query each resource's dataset."""
+    datasets = [dataset_no_embargo, dataset_with_embargo]
+    query_counts = []
+    created = 0
+    for size in (3, 12):
+        for i in range(created, size):
+            TabularResource.objects.create(
+                id=f"res-{i}",
+                title=f"Resource {i}",
+                uri=f"https://example.com/{i}.parquet",
+                dataset=datasets[i % 2],
+            )
+        created = size
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse(url_name))
+        assert response.status_code == 200
+        query_counts.append(len(ctx))
+
+    assert query_counts[0] == query_counts[1]
@@ -0,0 +1,77 @@
+from unittest.mock import Mock
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from dms.datasets.filters import DatasetFilter, ResourceFilter
+from dms.datasets.models import Dataset, Resource
+from dms.projects.models import Project, ProjectMembership
+
+
+@pytest.fixture
+def resources():
+    dataset = Dataset.objects.create(title="Test Dataset")
+    return [
+        Resource.objects.create(
+            id="in-description",
+            title="Forest plots",
+            description="Observations of wolves",
+            uri="test",
+            dataset=dataset,
+        ),
+        Resource.objects.create(
+            id="in-title",
+            title="Wolves",
+            uri="test",
+            dataset=dataset,
+        ),
+        Resource.objects.create(
+            id="in-metadata",
+            title="Other",
+            uri="test",
+            user_metadata={"keywords": ["wolves"]},
+            dataset=dataset,
+        ),
+        Resource.objects.create(
+            id="no-match",
+            title="Lakes",
+            uri="test",
+            dataset=dataset,
+        ),
+    ]
+
+
+@pytest.mark.django_db
+def test_resource_search_ranks_title_first(resources):
+    qs = ResourceFilter(data={"search": "wolf"}, queryset=Resource.objects.all()).qs
+    assert list(qs.values_list("id", flat=True)) == [
+        "in-title",
+        "in-description",
+        "in-metadata",
+    ]
+
+
+@pytest.mark.django_db
+def test_editable_filter(django_assert_num_queries):
+    user = get_user_model().objects.create_user(username="member")
+    project = Project.objects.create(
+        number="P001", name="Project", start_date="2023-01-01T00:00:00Z"
+    )
+    ProjectMembership.objects.create(project=project, user=user)
+    mine = Dataset.objects.create(title="Mine", project=project)
+    other = Dataset.objects.create(title="Other")
+
+    request = Mock(user=user)
+    with django_assert_num_queries(2):
+        editable = list(DatasetFilter(data={"editable": "true"}, request=request).qs)
+    assert editable == [mine]
+
+    qs = DatasetFilter(data={"editable": "false"}, request=request).qs
+    assert list(qs) == [other]
+
+    admin = get_user_model().objects.create_superuser(username="admin", password=None)
+    request = Mock(user=admin)
+    qs = DatasetFilter(data={"editable": "true"}, request=request).qs
+    assert set(qs) == {mine, other}
+    qs = DatasetFilter(data={"editable": "false"}, request=request).qs
+    assert list(qs) == []
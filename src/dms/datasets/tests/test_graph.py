@@ -0,0 +1,96 @@
+import pytest
+from django.urls import reverse
+
+from dms.datasets.enums import RelationshipType
+from dms.datasets.libs.graph import relationship_graph
+from dms.datasets.models import Dataset, DatasetRelationship
+
+
+@pytest.fixture
+def chain():
+    """a -> b -> c -> d, and b <- e with another relationship type"""
+    datasets = {
+        name: Dataset.objects.create(id=name, title=name.upper())
+        for name in ("a", "b", "c", "d", "e")
+    }
+    for source, target in (("a", "b"), ("b", "c"), ("c", "d")):
+        DatasetRelationship.objects.create(
+            source=datasets[source],
+            target=datasets[target],
+            type=RelationshipType.IS_PART_OF,
+        )
+    DatasetRelationship.objects.create(
+        source=datasets["e"], target=datasets["b"], type=RelationshipType.CITES
+    )
+    return datasets
+
+
+@pytest.mark.django_db
+def test_relationship_graph_depth(chain, django_assert_num_queries):
+    with django_assert_num_queries(2):
+        graph = relationship_graph("b", depth=1)
+
+    assert [(n.id, n.depth) for n in graph.nodes] == [
+        ("b", 0),
+        ("a", 1),
+        ("c", 1),
+        ("e", 1),
+    ]
+    assert {(e.source_id, e.target_id) for e in graph.edges} == {
+        ("a", "b"),
+        ("b", "c"),
+        ("e", "b"),
+    }
+    assert graph.nodes[0].relationship_types == [RelationshipType.IS_PART_OF]
+
+    graph = relationship_graph("b", depth=2)
+    assert {n.id for n in graph.nodes} == {"a", "b", "c", "d", "e"}
+
+
+@pytest.mark.django_db
+def test_relationship_graph_types_and_limit(chain):
+    graph = relationship_graph("b", depth=3, types=[RelationshipType.CITES])
+    assert [n.id for n in graph.nodes] == ["b", "e"]
+    assert len(graph.edges) == 1
+
+    graph = relationship_graph("b", depth=3, limit=2)
+    assert [n.id for n in graph.nodes] == ["b", "a"]
+    assert graph.truncated
+
+
+@pytest.mark.django_db
+def test_relationship_graph_api(client, chain):
+    url = reverse("api_v1:dataset-relationships-graph")
+
+    response = client.get(url, {"dataset": "a", "depth": 1})
+    assert response.status_code == 200
+    assert [n["id"] for n in response.json()["nodes"]] == ["a", "b"]
+
+    assert client.get(url, {"dataset": "missing"}).status_code == 404
+    assert client.get(url, {"dataset": "a", "type": "Unknown"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_relationship_neighbours_api(client, chain):
+    url = reverse("api_v1:dataset-relationships-neighbours")
+
+    response = client.get(url, {"dataset": "b"})
+    assert response.status_code == 200
+    neighbours = {
+        r["neighbour"]["id"]: r["neighbour"] for r in response.json()["results"]
+    }
+    assert {k: v["degree"] for k, v in neighbours.items()} == {"a": 1, "c": 2, "e": 1}
+    assert neighbours["c"]["relationship_types"] == [RelationshipType.IS_PART_OF]
+    assert neighbours["a"]["title"] == "A"
+
+    assert client.get(url).status_code == 400
+
+
+@pytest.mark.django_db
+def test_relationship_view_embeds_seed_only(client, chain):
+    response = client.get(reverse("datasets:dataset_relationship_list", args=["b"]))
+    assert response.status_code == 200
+    frontend_args = response.context["frontend_args"]
+    assert [n["id"] for n in frontend_args["nodes"]] == ["b"]
+    assert frontend_args["nodes"][0]["data"]["degree"] == 3
+    assert frontend_args["edges"] == []
@@ -1,8 +1,15 @@
+import time
 import uuid
+from datetime import UTC, datetime
+from unittest.mock import patch
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import LineString, Point, Polygon
+from osgeo import gdal  # type: ignore[import]
 
+from dms.datasets.libs import gdal_process
+from dms.datasets.libs.budget import InferenceBudget, estimate_stats_bytes
 from dms.datasets.models import (
     ContributionType,
     Dataset,
@@ -169,3 +176,271 @@ def test_resource_convert(resource):
     MapResource.objects.get().to_class(TabularResource)
     TabularResource.objects.get().to_class(RasterResource)
     RasterResource.objects.get().to_class(MapResource)
+
+
+@pytest.fixture
+def raster_resource(dataset):
+    """Create a raster resource synced with known validators"""
+    resource = RasterResource.objects.create(
+        id=uuid.uuid4(), uri="https://example.com/raster.tif", dataset=dataset
+    )
+    RasterResource.objects.filter(pk=resource.pk).update(
+        metadata={"http_headers": {"etag": '"abc"', "last_modified": "yesterday"}},
+        last_sync={"status": "ok", "warnings": []},
+    )
+    resource.refresh_from_db()
+    return resource
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "headers,expected",
+    [
+        ({"etag": '"abc"'}, True),
+        ({"etag": '"def"'}, False),
+        ({}, False),
+    ],
+)
+def test_resource_is_not_modified(raster_resource, headers, expected):
+    assert raster_resource._is_not_modified(headers) is expected
+
+
+@pytest.mark.django_db
+def test_raster_conditional_inference_skips_gdal(raster_resource):
+    with (
+        patch.object(Resource, "_get_http_headers", return_value={"etag": '"abc"'}),
+        patch.object(Resource, "_run_gdal") as run,
+    ):
+        raster_resource.infer_metadata(deferred=False, conditional=True)
+
+    run.assert_not_called()
+    raster_resource.refresh_from_db()
+    assert raster_resource.last_sync["status"] == "not modified"
+    assert raster_resource.metadata["http_headers"]["etag"] == '"abc"'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("etag,cleared", [('"abc"', False), ('"def"', True)])
+def test_raster_inference_clears_changed_remote_cache(raster_resource, etag, cleared):
+    with (
+        patch.object(Resource, "_get_http_headers", return_value={"etag": etag}),
+        patch("dms.datasets.models.gdal_process.clear_cache") as clear_cache,
+        patch.object(Resource, "_run_gdal", return_value={}),
+    ):
+        raster_resource.infer_metadata(deferred=False)
+
+    assert clear_cache.called is cleared
+    if cleared:
+        clear_cache.assert_called_once_with("/vsicurl/https://example.com/raster.tif")
+
+
+def test_gdal_process_stops_passes_over_budget():
+    started_at = time.monotonic()
+    with pytest.raises(gdal_process.BudgetExceeded):
+        gdal_process.run(time.sleep, 30, timeout=1, cache_size=1024)
+    assert time.monotonic() - started_at < 10
+
+    # a new process is started for the next passes, with the block cache sized
+    # before any use of GDAL
+    assert (
+        gdal_process.run(
+            gdal.GetConfigOption,
+            "CPL_VSIL_CURL_CACHE_SIZE",
+            timeout=30,
+            cache_size=1024,
+        )
+        == "1024"
+    )
+
+
+def test_estimate_stats_bytes():
+    info = {
+        "size": [10000, 10000],
+        "bands": [
+            {"type": "Byte", "overviews": [{"size": [100, 100]}, {"size": [10, 10]}]},
+            {"type": "Float32"},
+        ],
+    }
+    # the smallest overview with 2500 samples, and the full band
+    assert estimate_stats_bytes(info) == 100 * 100 + 10000 * 10000 * 4
+
+
+@pytest.mark.django_db
+def test_raster_inference_skips_stats_over_byte_budget(raster_resource, settings):
+    settings.DATASETS_METADATA_BYTE_BUDGET = 1000
+    header = {"size": [100, 100], "bands": [{"band": 1, "type": "Byte"}]}
+    with (
+        patch.object(Resource, "_get_http_headers", return_value={}),
+        patch.object(Resource, "_run_gdal", return_value=header) as run,
+    ):
+        raster_resource.infer_metadata(deferred=False)
+
+    run.assert_called_once()
+    assert "approx_stats" not in run.call_args.kwargs
+    raster_resource.refresh_from_db()
+    assert raster_resource.last_sync["status"] == "ok"
+    assert raster_resource.last_sync["warnings"][0].startswith("statistics skipped")
+    assert raster_resource.metadata["bands"] == header["bands"]
+
+
+@pytest.mark.django_db
+def test_tabular_inference_falls_back_over_time_budget(dataset, settings):
+    # the GDAL process cannot even start within the budget
+    settings.DATASETS_METADATA_TIME_BUDGET = 0.05
+    resource = TabularResource.objects.create(
+        id="tabular", uri="https://example.com/data.gpkg", dataset=dataset
+    )
+    layer = {"layers": [{"name": "first"}]}
+    started_at = time.monotonic()
+    with (
+        patch.object(Resource, "_get_http_headers", return_value={}),
+        patch.object(TabularResource, "_infer_first_layer", return_value=layer),
+    ):
+        resource.infer_metadata(deferred=False)
+    assert time.monotonic() - started_at < 10
+
+    resource.refresh_from_db()
+    assert resource.last_sync["status"] == "ok"
+    [warning] = resource.last_sync["warnings"]
+    assert warning.startswith(
+        "only the first layer was inferred: time budget exceeded, stopped after"
+    )
+    assert [t.name for t in resource.data_tables.all()] == ["first"]
+
+
+@pytest.mark.django_db
+def test_raster_inference_fails_over_time_budget(raster_resource, settings):
+    settings.DATASETS_METADATA_TIME_BUDGET = 0.05
+    with patch.object(Resource, "_get_http_headers", return_value={}):
+        raster_resource.infer_metadata(deferred=False)
+
+    raster_resource.refresh_from_db()
+    assert raster_resource.last_sync["status"] == "fail"
+    assert raster_resource.last_sync["error"].startswith("time budget exceeded")
+
+
+@pytest.fixture
+def bucket_settings(settings):
+    settings.AWS_ACCESS_KEY_ID = "key"
+    settings.AWS_SECRET_ACCESS_KEY = "secret"  # noqa: S105
+    settings.AWS_STORAGE_BUCKET_NAME = "bucket"
+    settings.AWS_S3_ENDPOINT_URL = "https://s3.example.com"
+    settings.AWS_S3_REGION_NAME = None
+    return settings
+
+
+@pytest.mark.django_db
+def test_bucket_resource_uses_vsis3(dataset, bucket_settings):
+    resource = RasterResource(
+        uri="https://s3.example.com/bucket/data/raster.tif", dataset=dataset
+    )
+    assert resource._gdal_path() == "/vsis3/bucket/data/raster.tif"
+    config = resource._gdal_config(InferenceBudget(10))
+    assert config["AWS_S3_ENDPOINT"] == "s3.example.com"
+    assert config["AWS_HTTPS"] == "YES"
+
+    bucket_settings.DATASETS_METADATA_S3_ENDPOINT_URL = "http://rustfs:9000"
+    config = resource._gdal_config(InferenceBudget(10))
+    assert config["AWS_S3_ENDPOINT"] == "rustfs:9000"
+    assert config["AWS_HTTPS"] == "NO"
+
+    with (
+        patch("dms.core.helpers.s3client.s3client.head_object") as head_object,
+        patch("dms.datasets.models.requests.head") as http_head,
+    ):
+        head_object.return_value = {
+            "ETag": '"abc"',
+            "LastModified": datetime(2025, 1, 1, tzinfo=UTC),
+            "ContentLength": 42,
+        }
+        assert resource._get_http_headers() == {
+            "etag": '"abc"',
+            "last_modified": "Wed, 01 Jan 2025 00:00:00 GMT",
+            "content_length": "42",
+        }
+    head_object.assert_called_once_with(Bucket="bucket", Key="data/raster.tif")
+    http_head.assert_not_called()
+
+    other = RasterResource(uri="https://example.com/raster.tif", dataset=dataset)
+    assert other._gdal_path() == "/vsicurl/https://example.com/raster.tif"
+    assert "AWS_S3_ENDPOINT" not in other._gdal_config(InferenceBudget(10))
+
+
+@pytest.mark.django_db
+def test_dataset_compute_extent(dataset):
+    other = Dataset.objects.create(title="Other Dataset")
+    for i, (ds, bbox) in enumerate(
+        [
+            (dataset, (0, 0, 1, 1)),
+            (dataset, (2, 3, 4, 5)),
+            (dataset, None),
+            (other, (10, 10, 11, 11)),
+        ]
+    ):
+        Resource.objects.create(
+            id=f"extent-{i}",
+            uri="test",
+            dataset=ds,
+            extent=Polygon.from_bbox(bbox) if bbox else None,
+        )
+
+    last_modified_at = dataset.last_modified_at
+    dataset.compute_extent()
+    assert dataset.extent.extent == (0, 0, 4, 5)
+    assert dataset.last_modified_at > last_modified_at
+
+    Dataset.objects.update(extent=None)
+    assert Dataset.objects.compute_extent() == 2
+    other.refresh_from_db()
+    assert other.extent.extent == (10, 10, 11, 11)
+
+    empty = Dataset.objects.create(title="Empty Dataset")
+    empty.compute_extent()
+    assert empty.extent is None
+
+
+@pytest.mark.django_db
+def test_dataset_compute_extent_pads_degenerate_boxes(dataset, settings):
+    settings.DATASETS_EXTENT_PADDING = 0.5
+    Resource.objects.create(
+        id="point", uri="test", dataset=dataset, extent=Point(1, 2, srid=4326)
+    )
+    dataset.compute_extent()
+    assert dataset.extent.geom_type == "Polygon"
+    assert dataset.extent.extent == (0.5, 1.5, 1.5, 2.5)
+
+    Resource.objects.create(
+        id="line",
+        uri="test",
+        dataset=dataset,
+        extent=LineString((1, 2), (3, 2), srid=4326),
+    )
+    dataset.compute_extent()
+    assert dataset.extent.extent == (1, 1.5, 3, 2.5)
+
+
+@pytest.mark.django_db
+def test_resource_extent_change_schedules_dataset_extent(
+    dataset, django_capture_on_commit_callbacks
+):
+    with patch("dms.datasets.models.app.configure_task") as configure_task:
+        with django_capture_on_commit_callbacks(execute=True):
+            resource = Resource.objects.create(
+                id="extent-change",
+                uri="test",
+                dataset=dataset,
+                extent=Polygon.from_bbox((0, 0, 1, 1)),
+            )
+        with django_capture_on_commit_callbacks(execute=True):
+            resource.title = "no extent change"
+            resource.save()
+        with django_capture_on_commit_callbacks(execute=True):
+            resource.delete()
+
+    extent_calls = [
+        c
+        for c in configure_task.call_args_list
+        if c.kwargs["name"] == "dms.datasets.tasks.compute_extent_task"
+    ]
+    assert len(extent_calls) == 2
+    assert extent_calls[0].kwargs["queueing_lock"] == f"compute_extent:{dataset.pk}"
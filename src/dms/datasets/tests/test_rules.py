@@ -4,7 +4,12 @@ import pytest
 from django.contrib.auth import get_user_model
 
 from dms.datasets.models import Dataset, Resource
-from dms.datasets.rules import dataset_in_user_projects, resource_in_user_projects
+from dms.datasets.rules import (
+    dataset_in_user_projects,
+    dataset_in_user_projects_q,
+    resource_in_user_projects,
+    resource_in_user_projects_q,
+)
 from dms.projects.models import Project, ProjectMembership
 
 User = get_user_model()
@@ -183,3 +188,55 @@ def test_resource_in_user_projects_user_not_in_project(setup_test_data):
 
     result = resource_in_user_projects(data["user"], other_resource)
     assert result is False
+
+
+@pytest.mark.django_db(transaction=True)
+def test_project_roles_are_cached_per_user(setup_test_data, django_assert_num_queries):
+    """Test that memberships are loaded once and reloaded after a change"""
+    data = setup_test_data
+    user = data["user"]
+    datasets = [data["dataset_with_project"], data["dataset_other_project"]] * 5
+
+    with django_assert_num_queries(1):
+        results = [dataset_in_user_projects(user, dataset) for dataset in datasets]
+    assert results == [True, False] * 5
+
+    ProjectMembership.objects.filter(user=user).delete()
+    assert dataset_in_user_projects(user, data["dataset_with_project"]) is False
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize(
+    "user", ["user", "staff_user", "other_user", "unauthenticated_user"]
+)
+def test_queryset_rules_match_predicates(setup_test_data, user):
+    """Test that the queryset rules select the objects the predicates allow"""
+    data = setup_test_data
+    user = data[user]
+
+    datasets = Dataset.objects.filter(dataset_in_user_projects_q(user))
+    assert set(datasets) == {
+        d for d in Dataset.objects.all() if dataset_in_user_projects(user, d)
+    }
+
+    resources = Resource.objects.filter(resource_in_user_projects_q(user))
+    assert set(resources) == {
+        r for r in Resource.objects.all() if resource_in_user_projects(user, r)
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_queryset_rules_allow_superusers(setup_test_data):
+    """Test that the queryset rules select every object for superusers"""
+    user = User.objects.create_superuser(
+        email="admin@example.com", username="admin", password=None
+    )
+
+    datasets = Dataset.objects.filter(dataset_in_user_projects_q(user))
+    assert set(datasets) == {
+        d for d in Dataset.objects.all() if user.has_perm("datasets.change_dataset", d)
+    }
+    assert datasets.count() == Dataset.objects.count()
+
+    resources = Resource.objects.filter(resource_in_user_projects_q(user))
+    assert resources.count() == Resource.objects.count()
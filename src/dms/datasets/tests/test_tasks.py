@@ -0,0 +1,255 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+from procrastinate import exceptions
+
+from dms.datasets.models import BucketObject, Dataset, Resource
+from dms.datasets.tasks import (
+    dispatch_metadata_jobs,
+    infer_metadata_task,
+    metadata_lock,
+    next_sync_interval,
+    scan_bucket_inventory,
+    update_metadata,
+)
+
+
+@pytest.fixture
+def resources():
+    dataset = Dataset.objects.create(title="Test Dataset")
+    return [
+        Resource.objects.create(
+            id=f"resource-{i}",
+            uri=f"https://{'a' if i % 2 else 'b'}.example.com/{i}.tif",
+            dataset=dataset,
+        )
+        for i in range(6)
+    ]
+
+
+def test_metadata_lock_caps_concurrency(settings):
+    settings.DATASETS_METADATA_CONCURRENCY = 4
+    settings.DATASETS_METADATA_HOST_CONCURRENCY = 2
+
+    locks = {metadata_lock("https://a.example.com/x.tif", i) for i in range(10)}
+    assert len(locks) == 2
+
+    every_lock = {
+        metadata_lock(f"https://host{h}.example.com/x.tif", i)
+        for h in range(20)
+        for i in range(10)
+    }
+    assert len(every_lock) <= 4
+
+
+@pytest.mark.django_db
+def test_dispatch_metadata_jobs(settings, resources):
+    settings.DATASETS_METADATA_DISPATCH_CHUNK_SIZE = 4
+
+    with (
+        patch("dms.datasets.tasks.close_old_connections"),
+        patch("dms.datasets.tasks.infer_metadata_task.configure") as configure,
+    ):
+        configure.return_value.defer.side_effect = [
+            1,
+            exceptions.AlreadyEnqueued(),
+            2,
+            3,
+            RuntimeError("boom"),
+            4,
+        ]
+        report = dispatch_metadata_jobs(Resource.objects.all())
+
+    assert report == {"dispatched": 4, "skipped": 1, "failed": 1}
+    assert configure.call_count == 6
+    assert {c.kwargs["queueing_lock"] for c in configure.call_args_list} == {
+        f"infer_metadata:{r.id}" for r in resources
+    }
+
+
+@pytest.mark.django_db
+def test_scan_bucket_inventory(settings):
+    settings.AWS_ACCESS_KEY_ID = "key"
+    settings.AWS_SECRET_ACCESS_KEY = "secret"  # noqa: S105
+    settings.AWS_STORAGE_BUCKET_NAME = "bucket"
+    settings.AWS_S3_ENDPOINT_URL = "https://s3.example.com"
+    settings.MEDIA_BASE_LOCATION = "data"
+    prefix = "https://s3.example.com/bucket/"
+    modified = datetime(2025, 1, 1, tzinfo=UTC)
+
+    dataset = Dataset.objects.create(title="Test Dataset")
+    for name in ("same", "new", "gone"):
+        Resource.objects.create(
+            id=name, uri=f"{prefix}data/{name}.tif", dataset=dataset
+        )
+    Resource.objects.create(
+        id="external", uri="https://example.com/external.tif", dataset=dataset
+    )
+    BucketObject.objects.bulk_create(
+        BucketObject(
+            key=f"data/{name}.tif",
+            size=1,
+            etag='"a"',
+            last_modified=modified,
+            scanned_at=modified,
+        )
+        for name in ("same", "deleted")
+    )
+    listing = [
+        {
+            "Contents": [
+                {
+                    "Key": f"data/{name}.tif",
+                    "Size": 1,
+                    "ETag": '"a"',
+                    "LastModified": modified,
+                }
+                for name in ("same", "new")
+            ]
+        }
+    ]
+
+    with (
+        patch("dms.datasets.tasks.close_old_connections"),
+        patch("dms.core.helpers.s3client.s3client.get_paginator") as get_paginator,
+        patch("dms.datasets.tasks.dispatch_metadata_jobs") as dispatch,
+    ):
+        get_paginator.return_value.paginate.return_value = listing
+        dispatch.return_value = {"dispatched": 1, "skipped": 0, "failed": 0}
+        report = scan_bucket_inventory()
+
+    assert report == {
+        "listed": 2,
+        "changed": 1,
+        "removed": 1,
+        "dispatched": 1,
+        "missing": 1,
+    }
+    assert [r.id for r in dispatch.call_args.args[0]] == ["new"]
+    assert set(BucketObject.objects.values_list("key", flat=True)) == {
+        "data/same.tif",
+        "data/new.tif",
+    }
+    assert Resource.objects.get(id="gone").last_sync["status"] == "missing"
+    assert Resource.objects.get(id="external").last_sync is None
+
+
+@pytest.mark.parametrize(
+    "status,previous_status,interval,expected",
+    [
+        # changes halve the interval, down to the minimum
+        ("ok", "ok", timedelta(hours=8), timedelta(hours=4)),
+        ("ok", None, None, timedelta(hours=1)),
+        # unchanged objects double it, up to the maximum
+        ("not modified", "ok", timedelta(hours=4), timedelta(hours=8)),
+        ("not modified", "ok", timedelta(hours=20), timedelta(hours=24)),
+        # failures back off exponentially from the minimum
+        ("fail", "ok", timedelta(hours=24), timedelta(hours=1)),
+        ("fail", "fail", timedelta(hours=2), timedelta(hours=4)),
+        (None, "not started", timedelta(days=5), timedelta(days=7)),
+    ],
+)
+def test_next_sync_interval(settings, status, previous_status, interval, expected):
+    settings.DATASETS_METADATA_MIN_INTERVAL = 60 * 60
+    settings.DATASETS_METADATA_MAX_INTERVAL = 24 * 60 * 60
+    settings.DATASETS_METADATA_FAILURE_MAX_INTERVAL = 7 * 24 * 60 * 60
+    assert next_sync_interval(status, previous_status, interval) == expected
+
+
+@pytest.mark.django_db
+def test_update_metadata_dispatches_due_resources(resources):
+    Resource.objects.filter(id="resource-1").update(
+        next_sync_at=timezone.now() + timedelta(hours=1)
+    )
+    Resource.objects.filter(id="resource-2").update(
+        next_sync_at=timezone.now() - timedelta(hours=1)
+    )
+
+    with (
+        patch("dms.datasets.tasks.close_old_connections"),
+        patch("dms.datasets.tasks.dispatch_metadata_jobs") as dispatch,
+    ):
+        dispatch.return_value = {"dispatched": 5, "skipped": 0, "failed": 0}
+        update_metadata(timestamp=0)
+
+    assert {r.id for r in dispatch.call_args.args[0]} == {
+        f"resource-{i}" for i in range(6) if i != 1
+    }
+
+
+@pytest.mark.django_db
+def test_update_metadata_retries_failed_bucket_resources(settings):
+    settings.AWS_ACCESS_KEY_ID = "key"
+    settings.AWS_SECRET_ACCESS_KEY = "secret"  # noqa: S105
+    settings.AWS_STORAGE_BUCKET_NAME = "bucket"
+    settings.AWS_S3_ENDPOINT_URL = "https://s3.example.com"
+    settings.MEDIA_BASE_LOCATION = "data"
+    prefix = "https://s3.example.com/bucket/data/"
+
+    dataset = Dataset.objects.create(title="Test Dataset")
+    for status in ("ok", "not modified", "fail", None):
+        Resource.objects.create(
+            id=f"bucket-{status}",
+            uri=f"{prefix}{status}.tif",
+            dataset=dataset,
+            last_sync={"status": status} if status else None,
+        )
+
+    with (
+        patch("dms.datasets.tasks.close_old_connections"),
+        patch("dms.datasets.tasks.dispatch_metadata_jobs") as dispatch,
+    ):
+        dispatch.return_value = {"dispatched": 2, "skipped": 0, "failed": 0}
+        update_metadata(timestamp=0)
+
+    assert {r.id for r in dispatch.call_args.args[0]} == {"bucket-fail", "bucket-None"}
+
+
+@pytest.mark.django_db
+def test_infer_metadata_task_schedules_next_sync(resources):
+    with (
+        patch("dms.datasets.tasks.close_old_connections"),
+        patch.object(Resource, "_get_http_headers", return_value={}),
+    ):
+        infer_metadata_task(resource_id="resource-0")
+
+    resource = Resource.objects.get(id="resource-0")
+    # nothing could be read from the remote object
+    assert resource.last_sync["status"] == "fail"
+    assert resource.sync_interval == timedelta(hours=2)
+    assert resource.next_sync_at > timezone.now() + timedelta(minutes=119)
+
+
+@pytest.mark.django_db
+def test_infer_metadata_task_skips_non_http_resources(resources):
+    Resource.objects.filter(id="resource-0").update(uri="doi:10.1000/182")
+    with (
+        patch("dms.datasets.tasks.close_old_connections"),
+        patch.object(Resource, "_get_http_headers") as get_http_headers,
+    ):
+        infer_metadata_task(resource_id="resource-0")
+
+    get_http_headers.assert_not_called()
+    resource = Resource.objects.get(id="resource-0")
+    assert resource.last_sync["status"] == "not started"
+    assert resource.sync_interval == timedelta(hours=2)
+
+
+@pytest.mark.django_db
+def test_infer_metadata_task_backs_off_errors(resources):
+    Resource.objects.filter(id="resource-0").update(
+        last_sync={"status": "ok"}, sync_interval=timedelta(hours=4)
+    )
+    with (
+        patch("dms.datasets.tasks.close_old_connections"),
+        patch.object(Resource, "infer_metadata", side_effect=RuntimeError("boom")),
+        pytest.raises(RuntimeError),
+    ):
+        infer_metadata_task(resource_id="resource-0")
+
+    resource = Resource.objects.get(id="resource-0")
+    # the first failure after a success restarts from the minimum interval
+    assert resource.sync_interval == timedelta(hours=1)
+    assert resource.next_sync_at > timezone.now() + timedelta(minutes=59)
@@ -0,0 +1,86 @@
+import pytest
+from django.contrib.gis.geos import Polygon
+from django.core.cache import cache
+from django.urls import reverse
+
+from dms.datasets.models import Dataset, Resource
+from dms.shared.api import tile_bounds
+
+
+def tile_url(z, x, y):
+    return reverse("api_v1:datasets-tiles", kwargs={"z": z, "x": x, "y": y})
+
+
+@pytest.fixture
+def datasets():
+    return [
+        Dataset.objects.create(
+            id="oslo",
+            title="Oslo",
+            version="1",
+            extent=Polygon.from_bbox((10.6, 59.8, 10.9, 60.0)),
+        ),
+        Dataset.objects.create(
+            id="tromso",
+            title="Tromso",
+            version="2",
+            extent=Polygon.from_bbox((18.8, 69.6, 19.1, 69.7)),
+        ),
+    ]
+
+
+def test_tile_bounds():
+    assert tile_bounds(0, 0, 0).extent == pytest.approx(
+        (-180, -85.0511, 180, 85.0511), abs=1e-4
+    )
+    assert tile_bounds(1, 1, 0).extent == pytest.approx((0, 0, 180, 85.0511), abs=1e-4)
+
+
+@pytest.mark.django_db
+def test_dataset_tiles(client, datasets):
+    # tile clients do not request a trailing slash
+    assert tile_url(0, 0, 0) == "/api/v1/datasets/tiles/0/0/0.mvt"
+    response = client.get(tile_url(0, 0, 0))
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/vnd.mapbox-vector-tile"
+    assert b"datasets" in response.content
+    assert b"Oslo" in response.content
+    assert b"Tromso" in response.content
+
+    response = client.get(tile_url(0, 0, 0), {"version": "1"})
+    assert b"Oslo" in response.content
+    assert b"Tromso" not in response.content
+
+    # southern hemisphere
+    assert client.get(tile_url(1, 1, 1)).content == b""
+    assert client.get(tile_url(1, 2, 0)).status_code == 404
+
+
+@pytest.mark.django_db
+def test_dataset_tiles_cache(
+    client, settings, datasets, django_capture_on_commit_callbacks
+):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    cache.clear()
+    assert b"Bergen" not in client.get(tile_url(0, 0, 0)).content
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Dataset.objects.create(
+            id="bergen",
+            title="Bergen",
+            extent=Polygon.from_bbox((5.2, 60.3, 5.4, 60.4)),
+        )
+    assert b"Bergen" in client.get(tile_url(0, 0, 0)).content
+
+    # extents recomputed by a bulk update
+    Resource.objects.create(
+        id="stavanger",
+        uri="test",
+        dataset=Dataset.objects.create(id="stavanger", title="Stavanger"),
+        extent=Polygon.from_bbox((5.6, 58.9, 5.8, 59.0)),
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        Dataset.objects.filter(pk="stavanger").compute_extent()
+    assert b"Stavanger" in client.get(tile_url(0, 0, 0)).content
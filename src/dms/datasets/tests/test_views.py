@@ -1,7 +1,23 @@
+import json
+import time
+from datetime import date, timedelta
+from unittest.mock import patch
+
 import pytest
+from django.contrib.gis.geos import Polygon
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import http_date
 
-from dms.datasets.models import ContributionType, Dataset, DatasetContribution
+from dms.datasets.models import (
+    ContributionType,
+    Dataset,
+    DatasetContribution,
+    DataTable,
+    RasterResource,
+    Resource,
+)
 
 
 @pytest.fixture
@@ -50,3 +66,281 @@ def test_dataset_clone_view(client, dataset, user):
 
     # Check that we were redirected to the detail page
     assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_resource_api_sparse_fields(client, dataset):
+    """Test that ?fields= and ?omit= prune the response and the query."""
+    Resource.objects.create(
+        id="resource",
+        title="Resource",
+        uri="https://example.com/data.tif",
+        metadata={"bands": ["band"] * 100},
+        dataset=dataset,
+    )
+    url = reverse("api_v1:resources-list")
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url, {"fields": "id,title,uri"})
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"id": "resource", "title": "Resource", "uri": "https://example.com/data.tif"}
+    ]
+    assert not any(
+        '"datasets_resource"."metadata"' in q["sql"] for q in ctx.captured_queries
+    )
+
+    response = client.get(
+        reverse("api_v1:resources-detail", kwargs={"pk": "resource"}),
+        {"omit": "metadata,user_metadata"},
+    )
+    assert response.status_code == 200
+    assert "metadata" not in response.json()
+    assert "last_sync" in response.json()
+
+
+@pytest.mark.django_db
+def test_dataset_api_export(client):
+    """Test that the export endpoints stream every filtered dataset."""
+    for i in range(5):
+        Dataset.objects.create(
+            id=f"dataset-{i}",
+            title=f"Dataset {i}",
+            version="2" if i % 2 else "1",
+            extent=Polygon.from_bbox((i, i, i + 1, i + 1)) if i < 2 else None,
+        )
+
+    response = client.get(reverse("api_v1:datasets-export"), {"version": "1"})
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert sorted(json.loads(line)["id"] for line in lines) == [
+        "dataset-0",
+        "dataset-2",
+        "dataset-4",
+    ]
+
+    response = client.get(reverse("api_v1:datasets-export-extents"))
+    assert response.status_code == 200
+    records = b"".join(response.streaming_content).decode().split("\x1e")[1:]
+    features = [json.loads(record) for record in records]
+    assert sorted(f["id"] for f in features) == ["dataset-0", "dataset-1"]
+    assert features[0]["geometry"]["type"] == "Polygon"
+
+
+@pytest.mark.django_db
+def test_dataset_api_features(client):
+    """Test the feature collection of the dataset extents."""
+    Dataset.objects.create(
+        id="oslo",
+        title="Oslo",
+        extent=Polygon.from_bbox((10.61234567, 59.8, 10.9, 60.0)),
+    )
+    Dataset.objects.create(
+        id="tromso",
+        title="Tromso",
+        extent=Polygon.from_bbox((18.8, 69.6, 19.1, 69.7)),
+    )
+    url = reverse("api_v1:datasets-features")
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/geo+json"
+    data = json.loads(b"".join(response.streaming_content))
+    assert data["type"] == "FeatureCollection"
+    assert sorted(f["id"] for f in data["features"]) == ["oslo", "tromso"]
+
+    response = client.get(url, {"bbox": "10,59,11,61", "zoom": 5})
+    data = json.loads(b"".join(response.streaming_content))
+    assert [f["id"] for f in data["features"]] == ["oslo"]
+    assert data["features"][0]["properties"] == {"title": "Oslo"}
+    # a tenth of a pixel at zoom 5 is about 0.004 degrees
+    assert data["features"][0]["geometry"]["coordinates"][0][0] == [10.612, 59.8]
+
+    response = client.get(url, {"precision": 1})
+    data = json.loads(b"".join(response.streaming_content))
+    assert {f["geometry"]["coordinates"][0][0][0] for f in data["features"]} == {
+        10.6,
+        18.8,
+    }
+
+    response = client.get(url, {"bbox": "0,0,1,1"})
+    assert json.loads(b"".join(response.streaming_content))["features"] == []
+
+    assert client.get(url, {"bbox": "1,2,3"}).status_code == 400
+    assert client.get(url, {"precision": 20}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_dataset_api_coverage(client):
+    """Test the counts of the dataset extents per grid cell."""
+    Dataset.objects.create(
+        id="small", title="Small", extent=Polygon.from_bbox((10.2, 60.2, 10.4, 60.4))
+    )
+    Dataset.objects.create(
+        id="large",
+        title="Large",
+        version="2",
+        extent=Polygon.from_bbox((10.6, 60.6, 11.4, 60.8)),
+    )
+    Dataset.objects.create(id="none", title="None")
+    url = reverse("api_v1:datasets-coverage")
+
+    response = client.get(url, {"bbox": "10,60,12,61"})
+    assert response.status_code == 200
+    assert response.json() == {
+        "size": 1.0,
+        "cells": [
+            {"i": 10, "j": 60, "bbox": [10.0, 60.0, 11.0, 61.0], "count": 2},
+            {"i": 11, "j": 60, "bbox": [11.0, 60.0, 12.0, 61.0], "count": 1},
+        ],
+    }
+
+    response = client.get(url, {"size": 0.5, "bbox": "10,60,12,61", "version": "2"})
+    cells = {(c["i"], c["j"]): c["count"] for c in response.json()["cells"]}
+    assert cells == {(21, 121): 1, (22, 121): 1}
+
+    assert client.get(url, {"size": 0.01}).status_code == 400
+    assert client.get(url, {"bbox": "10,60"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_resource_api_bulk(client, user, django_capture_on_commit_callbacks):
+    """Test that the bulk endpoint creates, updates and deletes resources."""
+    dataset = Dataset.objects.create(id="dataset", title="Dataset")
+    url = reverse("api_v1:rasterresources-bulk")
+    items = [
+        {"id": f"tile-{i}", "uri": f"https://example.com/{i}.tif"} for i in range(3)
+    ]
+    for item in items:
+        item["dataset_id"] = dataset.pk
+
+    client.force_login(user)
+    response = client.post(url, items, content_type="application/json")
+    assert response.status_code == 403
+
+    user.is_staff = True
+    user.save()
+    with (
+        patch("dms.datasets.api.views.defer_metadata_jobs") as defer,
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        response = client.post(url, items, content_type="application/json")
+    assert response.status_code == 201
+    assert [r["id"] for r in response.json()] == ["tile-0", "tile-1", "tile-2"]
+    assert RasterResource.objects.filter(dataset=dataset).count() == 3
+    assert [r.id for r in defer.call_args.args[0]] == ["tile-0", "tile-1", "tile-2"]
+
+    response = client.post(url, items[:1], content_type="application/json")
+    assert response.status_code == 400
+
+    with (
+        patch("dms.datasets.api.views.defer_metadata_jobs") as defer,
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        response = client.patch(
+            url,
+            [
+                {"id": "tile-0", "title": "First"},
+                {"id": "tile-1", "uri": "https://example.com/moved.tif"},
+            ],
+            content_type="application/json",
+        )
+    assert response.status_code == 200
+    assert RasterResource.objects.get(pk="tile-0").title == "First"
+    assert [r.id for r in defer.call_args.args[0]] == ["tile-1"]
+
+    response = client.delete(url, ["tile-0", "tile-1"], content_type="application/json")
+    assert response.status_code == 204
+    assert list(Resource.objects.values_list("id", flat=True)) == ["tile-2"]
+
+
+@pytest.mark.django_db
+def test_dataset_api_conditional_get(client):
+    """Test that unchanged datasets are answered with 304 Not Modified."""
+    dataset = Dataset.objects.create(id="dataset", title="Dataset")
+    url = reverse("api_v1:datasets-detail", kwargs={"pk": dataset.pk})
+
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response["ETag"]
+    assert etag.startswith('W/"')
+    assert "Last-Modified" in response
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url, headers={"if-none-match": etag})
+    assert response.status_code == 304
+    # only the validators are read
+    assert not any(
+        '"datasets_dataset"."title"' in q["sql"] for q in ctx.captured_queries
+    )
+
+    list_url = reverse("api_v1:datasets-list")
+    list_etag = client.get(list_url)["ETag"]
+    assert client.get(list_url, headers={"if-none-match": list_etag}).status_code == 304
+
+    dataset.title = "Renamed"
+    dataset.save()
+    response = client.get(url, headers={"if-none-match": etag})
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+    Dataset.objects.create(id="other", title="Other")
+    response = client.get(list_url, headers={"if-none-match": list_etag})
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_dataset_api_list_ignores_if_modified_since(client):
+    """Test that deletions are not hidden from If-Modified-Since on lists."""
+    Dataset.objects.create(id="dataset", title="Dataset")
+    other = Dataset.objects.create(id="other", title="Other")
+    url = reverse("api_v1:datasets-list")
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert "Last-Modified" not in response
+    since = http_date(time.time() + 60)
+
+    other.delete()
+    response = client.get(url, headers={"if-modified-since": since})
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_resource_api_etag_follows_inference_and_embargo(client):
+    """Test that inferences and expired embargoes change the ETag."""
+    dataset = Dataset.objects.create(
+        id="dataset", title="Dataset", embargo_end_date=date.today() + timedelta(1)
+    )
+    resource = Resource.objects.create(
+        id="resource", uri="https://example.com/data.tif", dataset=dataset
+    )
+    url = reverse("api_v1:resources-detail", kwargs={"pk": resource.pk})
+    etag = client.get(url)["ETag"]
+
+    with patch.object(Resource, "_get_http_headers", return_value={"etag": '"a"'}):
+        resource.infer_metadata(deferred=False)
+    response = client.get(url, headers={"if-none-match": etag})
+    assert response.status_code == 200
+    etag = response["ETag"]
+
+    # the embargo expires without any write to the resource or the dataset
+    Dataset.objects.update(embargo_end_date=date.today())
+    response = client.get(url, headers={"if-none-match": etag})
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_datatable_api_export(client, dataset):
+    """Test that data tables, which have no rules permissions, are exported."""
+    resource = Resource.objects.create(id="resource", uri="test", dataset=dataset)
+    DataTable.objects.create(
+        resource=resource, name="table", extent=Polygon.from_bbox((0, 0, 1, 1))
+    )
+
+    response = client.get(reverse("api_v1:datatables-export-extents"))
+    assert response.status_code == 200
+    record = b"".join(response.streaming_content).decode().split("\x1e")[1]
+    assert json.loads(record)["id"] == "resource__table"
@@ -4,9 +4,12 @@ import json
 from dataclasses import dataclass
 
 from django.contrib import messages
+from django.core.cache import cache
 from django.db.models import F, Q
 from django.http import HttpResponse, HttpResponseRedirect
+from django.template.loader import render_to_string
 from django.urls import reverse, reverse_lazy
+from django.utils.timezone import localdate
 from django.views.generic import (
     CreateView,
     DeleteView,
@@ -27,8 +30,10 @@ from view_breadcrumbs import (
 )
 
 from dms.frontend.views import FrontendMixin
+from dms.shared.cache import versioned_key
 from dms.shared.views import ActionView
 
+from .conf import settings
 from .filters import DatasetFilter, ResourceFilter
 from .forms import (
     DatasetContributorForm,
@@ -42,6 +47,7 @@ from .forms import (
     ResourceForm,
     TabularResourceForm,
 )
+from .libs.graph import node_annotations
 from .models import (
     Dataset,
     DatasetContribution,
@@ -57,7 +63,6 @@ from .tables import (
     DatasetContributionTable,
     DatasetInternalRelated,
     DatasetRelated,
-    DatasetRelationshipTable,
     DatasetTable,
     DataTableListTable,
     ResourceListTable,
@@ -86,12 +91,7 @@ class ResourceListView(
     permission_required = "datasets.view_resource"
 
     def get_queryset(self):
-        return (
-            super()
-            .get_queryset()
-            .select_subclasses()
-            .select_related("dataset", "dataset__project")
-        )
+        return super().get_queryset().for_listing()
 
 
 @dataclass
@@ -108,6 +108,34 @@ class DatasetDetailView(PermissionRequiredMixin, DetailBreadcrumbMixin, DetailVi
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
+        ctx["can_change"] = self.request.user.has_perm(
+            "datasets.change_dataset", self.object
+        )
+
+        # the sections are shared by the users with the same permissions,
+        # until the dataset or what it shows is saved
+        key = versioned_key(
+            "dataset_detail",
+            Dataset,
+            self.object.pk,
+            ctx["can_change"],
+            self.request.build_absolute_uri("/"),
+            self.request.GET.urlencode(),
+            localdate(),
+        )
+        sections = cache.get(key)
+        if sections is None:
+            sections = render_to_string(
+                "datasets/partials/dataset_sections.html",
+                self.get_sections_context(ctx),
+                request=self.request,
+            )
+            cache.set(key, sections)
+        ctx["sections"] = sections
+        return ctx
+
+    def get_sections_context(self, ctx):
+        ctx = dict(ctx)
         ctx["contributor_table"] = DatasetContributionTable(
             list(
                 self.object.contributor_roles.select_related("user")
@@ -123,9 +151,7 @@ class DatasetDetailView(PermissionRequiredMixin, DetailBreadcrumbMixin, DetailVi
                 for c in self.object.metadata.get("contributors", [])
             ]  # noqa: E501
         )
-        ctx["resource_table"] = ResourceTable(
-            self.object.resources.select_subclasses().all()
-        )
+        ctx["resource_table"] = ResourceTable(self.object.resources.for_listing())
 
         if self.object.metadata.get("related"):
             ctx["related_table"] = DatasetRelated(
@@ -231,12 +257,7 @@ class DatasetComputeExtentView(PermissionRequiredMixin, ActionView):
     permission_required = "datasets.change_dataset"
 
     def get_queryset(self):
-        return (
-            super()
-            .get_queryset()
-            .select_related("project")
-            .prefetch_related("contributor_roles", "resources", "tags")
-        )
+        return super().get_queryset().select_related("project")
 
     def execute(self):
         self.object.compute_extent()
@@ -377,19 +398,20 @@ class ResourceDetailView(PermissionRequiredMixin, DetailView):
             "snippets_default": snippets[0].get("template") if snippets else "",
         }
 
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
-
-        ctx["metadata_preview"] = SvelteJSONEditorWidget(
-            props={"mode": "view", "readOnly": True, "navigationBar": False},
-            attrs={"id": "metadata_preview"},
-            wrapper_class="svelte-jsoneditor-wrapper",
-        ).render(
-            name="metadata_preview", value=json.dumps(self.object.metadata, indent=2)
-        )
+    def get_metadata_previews(self):
+        previews = {
+            "metadata_preview": SvelteJSONEditorWidget(
+                props={"mode": "view", "readOnly": True, "navigationBar": False},
+                attrs={"id": "metadata_preview"},
+                wrapper_class="svelte-jsoneditor-wrapper",
+            ).render(
+                name="metadata_preview",
+                value=json.dumps(self.object.metadata, indent=2),
+            )
+        }
 
         if self.object.user_metadata:
-            ctx["user_metadata_preview"] = SvelteJSONEditorWidget(
+            previews["user_metadata_preview"] = SvelteJSONEditorWidget(
                 props={"mode": "view", "readOnly": True, "navigationBar": False},
                 attrs={"id": "user_metadata_preview"},
                 wrapper_class="svelte-jsoneditor-wrapper",
@@ -397,6 +419,18 @@ class ResourceDetailView(PermissionRequiredMixin, DetailView):
                 name="user_metadata_preview",
                 value=json.dumps(self.object.user_metadata, indent=2),
             )
+        return previews
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+
+        # the json previews of large metadata are slow to render
+        key = versioned_key("resource_previews", Resource, self.object.pk)
+        previews = cache.get(key)
+        if previews is None:
+            previews = self.get_metadata_previews()
+            cache.set(key, previews)
+        ctx.update(previews)
 
         ctx["FEATURE_URL"] = self.request.build_absolute_uri(
             reverse("api_v1:resources-geojson-feature", kwargs={"pk": self.object.pk})
@@ -471,51 +505,32 @@ class ResourceUpdateView(
         )
 
 
-class DatasetRelationshipListView(PermissionRequiredMixin, FrontendMixin, ListView):
-    queryset = DatasetRelationship.objects.all()
-    table_class = DatasetRelationshipTable
+class DatasetRelationshipListView(PermissionRequiredMixin, FrontendMixin, DetailView):
+    """
+    Relationship graph editor. Only the seed dataset is embedded in the page,
+    its neighbours are fetched on demand from the neighbours API.
+    """
+
+    queryset = Dataset.objects.only("id", "title").annotate(**node_annotations("pk"))
     permission_required = "datasets.view_datasetrelationship"
     frontend_module = "relationships"
 
-    def get_queryset(self):
-        return (
-            super()
-            .get_queryset()
-            .filter(
-                Q(source_id=self.kwargs["pk"])
-                | Q(target_id=self.kwargs["pk"])
-                | Q(source__target_rels__source_id=self.kwargs["pk"])
-                | Q(source__target_rels__target_id=self.kwargs["pk"])
-                | Q(source__source_rels__target_id=self.kwargs["pk"])
-                | Q(source__source_rels__source_id=self.kwargs["pk"])
-                #
-                | Q(target__target_rels__source_id=self.kwargs["pk"])
-                | Q(target__target_rels__target_id=self.kwargs["pk"])
-                | Q(target__source_rels__source_id=self.kwargs["pk"])
-                | Q(target__source_rels__target_id=self.kwargs["pk"])
-            )
-            .distinct()
-        )
+    def get_permission_object(self):
+        return None
 
     def get_initial_data(self):
         initial = super().get_initial_data()
-        qs = self.get_queryset()
-
-        datasets = Dataset.objects.filter(
-            Q(id=self.kwargs["pk"])
-            | Q(target_rels__source_id=self.kwargs["pk"])
-            | Q(source_rels__target_id=self.kwargs["pk"])
-        ).prefetch_related("source_rels")
 
         initial["nodes"] = [
             {
-                "id": ds.id,
+                "id": self.object.id,
                 "data": {
-                    "label": ds.title,
-                    "relationshipTypes": list(
-                        set(ds.source_rels.values_list("type", flat=True))
+                    "label": self.object.title,
+                    "relationshipTypes": self.object.relationship_types,
+                    "url": reverse(
+                        "datasets:dataset_detail", kwargs={"pk": self.object.id}
                     ),
-                    "url": reverse("datasets:dataset_detail", kwargs={"pk": ds.id}),
+                    "degree": self.object.degree,
                 },
                 "position": {
                     "y": 0,
@@ -523,19 +538,8 @@ class DatasetRelationshipListView(PermissionRequiredMixin, FrontendMixin, ListVi
                 },
                 "type": "dataset",
             }
-            for ds in datasets
-        ]
-
-        initial["edges"] = [
-            {
-                "id": rel.uuid,
-                "source": rel.source_id,
-                "target": rel.target_id,
-                "sourceHandle": rel.type,
-                "type": "smart",
-            }
-            for rel in qs.all()
         ]
+        initial["edges"] = []
 
         initial["relTypes"] = [
             {"label": label, "value": value}
@@ -545,6 +549,10 @@ class DatasetRelationshipListView(PermissionRequiredMixin, FrontendMixin, ListVi
         initial["urls"] = {
             "datasetList": reverse("api_v1:datasets-list"),
             "datasetRelationshipList": reverse("api_v1:dataset-relationships-list"),
+            "relationshipGraph": reverse("api_v1:dataset-relationships-graph"),
+            "relationshipNeighbours": reverse(
+                "api_v1:dataset-relationships-neighbours"
+            ),
         }
 
         return initial
@@ -670,7 +678,7 @@ class ResourceRefreshMetadataView(PermissionRequiredMixin, ActionView):
         return queryset.select_subclasses().get(pk=self.kwargs["pk"])
 
     def execute(self):
-        self.object.infer_metadata()
+        self.object.infer_metadata(priority=settings.DATASETS_METADATA_USER_PRIORITY)
         messages.info(
             self.request,
             "Metadata collection has been queued and will be processed asynchronously.",
@@ -18,6 +18,7 @@ const selector = (state: AppState) => ({
   onEdgesChange: state.onEdgesChange,
   onConnect: state.onConnect,
   applyLayout: state.applyLayout,
+  expandNode: state.expandNode,
 });
 
 const defaultEdgeOptions = {
@@ -34,11 +35,12 @@ const defaultEdgeOptions = {
 const snapGrid = [20, 20] as [number, number];
 
 function App() {
-  const { nodes, edges, onNodesChange, onEdgesChange, onConnect, applyLayout } = useStore(
-    useShallow(selector),
-  );
+  const { nodes, edges, onNodesChange, onEdgesChange, onConnect, applyLayout, expandNode } =
+    useStore(useShallow(selector));
 
   useEffect(() => {
+    // only the seed dataset is embedded in the page, load its neighbours
+    nodes.forEach(n => expandNode(n.id));
     setTimeout(applyLayout, 100);
   }, []);
 
@@ -8,6 +8,7 @@ import { useCallback, useState } from 'react';
 
 export function DatasetNode({ data, selected, id, ..._props }: NodeProps<AppNode>) {
   const addRelTypeToNode = useStore(state => state.addRelTypeToNode);
+  const expandNode = useStore(state => state.expandNode);
   const [selectedRel, setSelectedRel] = useState('');
 
   const addRelType = useCallback(() => {
@@ -54,6 +55,16 @@ export function DatasetNode({ data, selected, id, ..._props }: NodeProps<AppNode
           <i className="fas fa-link"></i>
         </a>
         {data?.label}
+        {data.next !== null && (
+          <button
+            className="nodrag nopan ml-2 text-primary"
+            title="Load related datasets"
+            onClick={() => expandNode(id)}
+          >
+            <i className="fas fa-expand-alt"></i>
+            {data.degree !== undefined && <span className="ml-1">{data.degree}</span>}
+          </button>
+        )}
       </div>
       <Handle
         type="target"
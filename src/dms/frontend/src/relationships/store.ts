@@ -1,7 +1,14 @@
 import { create } from 'zustand';
 import { addEdge, applyNodeChanges, applyEdgeChanges, Edge } from '@xyflow/react';
 
-import { Dataset, Relationship, type AppState } from './types';
+import {
+  Dataset,
+  Neighbour,
+  Page,
+  Relationship,
+  type AppNode,
+  type AppState,
+} from './types';
 import { client, config } from './config';
 import { graphLayout, relToEdge } from './utils';
 import toast from 'react-hot-toast';
@@ -136,6 +143,55 @@ const useStore = create<AppState>((set, get) => ({
     });
     toast.success('Successfully loaded ' + dataset.title);
   },
+  expandNode: async (id: string) => {
+    const node = get().nodes.find(n => n.id === id);
+    if (!node || node.data.next === null) return;
+
+    const res = await client
+      .get<Page<Neighbour>>(node.data.next ?? config.urls.relationshipNeighbours, {
+        params: node.data.next ? {} : { dataset: id },
+      })
+      .catch((e: any) => {
+        console.error(e);
+        if (e?.message) toast.error(String(e.message));
+      });
+    if (!res) return;
+
+    const { nodes, edges, edgeIndex } = get();
+    const nodeIndex = new Set(nodes.map(n => n.id));
+    const newNodes: AppNode[] = [];
+    res.data.results.forEach(({ neighbour }) => {
+      if (nodeIndex.has(neighbour.id)) return;
+      nodeIndex.add(neighbour.id);
+      newNodes.push({
+        id: neighbour.id,
+        type: 'dataset',
+        data: {
+          url: neighbour.url,
+          label: neighbour.title,
+          relationshipTypes: neighbour.relationship_types,
+          degree: neighbour.degree,
+        },
+        position: { x: 0, y: 0 },
+      });
+    });
+    const newEdges = [
+      ...edges,
+      ...res.data.results.filter(r => !edgeIndex.has(r.uuid)).map(r => relToEdge(r)),
+    ];
+
+    set({
+      edgeIndex: new Set(newEdges.map(e => e.id)),
+      nodes: graphLayout(
+        [
+          ...nodes.map(n => (n.id === id ? { ...n, data: { ...n.data, next: res.data.next } } : n)),
+          ...newNodes,
+        ],
+        newEdges,
+      ),
+      edges: newEdges,
+    });
+  },
 }));
 
 export default useStore;
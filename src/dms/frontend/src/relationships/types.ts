@@ -10,6 +10,9 @@ export type AppNode = Node<{
   label: string;
   relationshipTypes: string[];
   url: string;
+  degree?: number;
+  // next page of neighbours, null once they are all loaded
+  next?: string | null;
 }>;
 
 export type Dataset = {
@@ -25,6 +28,19 @@ export type Relationship = {
   type: string;
 };
 
+export type Neighbour = Relationship & {
+  neighbour: Dataset & {
+    degree: number;
+    relationship_types: string[];
+  };
+};
+
+export type Page<T> = {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+};
+
 export type AppState = {
   nodes: AppNode[];
   edges: Edge[];
@@ -37,6 +53,7 @@ export type AppState = {
   applyLayout: () => void;
   addRelTypeToNode: (id: string, relationshipType: string) => void;
   addDataset: (dataset: Dataset, relationships: Relationship[]) => void;
+  expandNode: (id: string) => Promise<void>;
 };
 
 export type Option = {
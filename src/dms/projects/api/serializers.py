@@ -1,9 +1,11 @@
 from rest_framework import serializers
 
+from dms.shared.api import SparseFieldsSerializerMixin
+
 from ..models import DMP, Project
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Project
         fields = [
@@ -18,7 +20,7 @@ class ProjectSerializer(serializers.ModelSerializer):
         ]
 
 
-class DMPSerializer(serializers.ModelSerializer):
+class DMPSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = DMP
         fields = [
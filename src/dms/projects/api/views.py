@@ -2,12 +2,15 @@ from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.viewsets import GenericViewSet, mixins
 from rules.contrib.rest_framework import AutoPermissionViewSetMixin
 
+from dms.shared.api import ConditionalGetViewSetMixin, SparseFieldsViewSetMixin
+
 from ..filters import ProjectFilter
 from ..models import DMP, Project
 from .serializers import DMPSerializer, ProjectSerializer
 
 
 class ProjectModelViewSet(
+    SparseFieldsViewSetMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -26,8 +29,10 @@ class ProjectModelViewSet(
 
 
 class DMPModelViewSet(
+    SparseFieldsViewSetMixin,
     mixins.UpdateModelMixin,
     AutoPermissionViewSetMixin,
+    ConditionalGetViewSetMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     GenericViewSet,
@@ -35,3 +40,4 @@ class DMPModelViewSet(
     queryset = DMP.objects.all()
     serializer_class = DMPSerializer
     pagination_class = LimitOffsetPagination
+    conditional_fields = ("updated_at",)
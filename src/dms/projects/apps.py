@@ -1,7 +1,16 @@
 from django.apps.config import AppConfig
+from django.db.models.signals import post_delete, post_save
 from django.utils.translation import gettext_lazy as _
 
 
 class ProjectConfig(AppConfig):
     verbose_name = _("Project")
     name = "dms.projects"
+
+    def ready(self):
+        from .rules import invalidate_project_roles
+
+        post_save.connect(invalidate_project_roles, sender="projects.ProjectMembership")
+        post_delete.connect(
+            invalidate_project_roles, sender="projects.ProjectMembership"
+        )
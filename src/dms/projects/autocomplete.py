@@ -1,9 +1,11 @@
 from dal import autocomplete
 
+from dms.shared.autocomplete import TrigramAutocompleteMixin
+
 from .models import Category, DMPSchema, Project, ProjectTopic, Section
 
 
-class ProjectAutocomplete(autocomplete.Select2QuerySetView):
+class ProjectAutocomplete(TrigramAutocompleteMixin, autocomplete.Select2QuerySetView):
     model = Project
     search_fields = [
         "name",
@@ -2,6 +2,7 @@ from pathlib import Path
 
 import rules
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.urls import reverse
 from rules.contrib.models import RulesModel
@@ -227,6 +228,13 @@ class Project(RulesModel):
         )
 
     class Meta:
+        indexes = [
+            GinIndex(
+                fields=["name", "number"],
+                name="project_trgm_idx",
+                opclasses=["gin_trgm_ops", "gin_trgm_ops"],
+            ),
+        ]
         rules_permissions = {
             "add": rules.is_staff,
             "view": rules.always_allow,
@@ -1,5 +1,32 @@
 import rules
 
+# bumped whenever a ProjectMembership is saved or deleted in this process,
+# stale project roles cached on user instances are then reloaded
+_memberships_version = 0
+
+
+def invalidate_project_roles(**kwargs):
+    global _memberships_version
+    _memberships_version += 1
+
+
+def get_project_roles(user) -> dict[str, set[str]]:
+    """
+    Return the roles of the user in each of their projects, keyed by project id.
+
+    The map is loaded with a single query and cached on the user instance,
+    which lives as long as the request it is attached to.
+    """
+    version, roles = getattr(user, "_project_roles_cache", (None, None))
+    if version == _memberships_version:
+        return roles
+
+    roles = {}
+    for project_id, role in user.memberships.values_list("project_id", "role"):
+        roles.setdefault(project_id, set()).add(role)
+    user._project_roles_cache = (_memberships_version, roles)
+    return roles
+
 
 def project_role_is(role):
     @rules.predicate
@@ -7,7 +34,7 @@ def project_role_is(role):
         if not user.is_authenticated:
             return False
         if project:
-            return project.members.filter(user=user, role=role).exists()
+            return role in get_project_roles(user).get(project.pk, ())
 
         return False
 
@@ -20,7 +47,7 @@ def is_project_participant(user, project):
         return False
     if not project:
         return True
-    return project.memberships.filter(user=user).exists()
+    return project.pk in get_project_roles(user)
 
 
 @rules.predicate
@@ -40,8 +67,8 @@ def is_protected(user, instance):
 def dmp_project_role_is(role):
     @rules.predicate
     def has_role_in_project(user, dmp):
-        if user.is_authenticated and dmp and dmp.project:
-            return dmp.project.members.filter(user=user, role=role).exists()
+        if user.is_authenticated and dmp and dmp.project_id:
+            return role in get_project_roles(user).get(dmp.project_id, ())
         return False
 
     return has_role_in_project
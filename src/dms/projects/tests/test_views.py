@@ -502,3 +502,21 @@ class TestProjectMembershipDeleteView:
         assert (
             ProjectMembership.objects.filter(project=project, user=member).count() == 0
         )
+
+
+@pytest.mark.django_db
+def test_project_autocomplete_ranks_by_similarity(client):
+    """The project autocomplete matches typos and ranks by similarity."""
+    for number, name in [
+        ("P100", "Wolf monitoring"),
+        ("P101", "Wolverine and wolf tracking"),
+        ("P102", "Lake sediments"),
+    ]:
+        Project.objects.create(number=number, name=name, start_date=timezone.now())
+
+    response = client.get(reverse("autocomplete:project"), {"q": "wolf monitorng"})
+
+    assert response.status_code == 200
+    results = [r["id"] for r in json.loads(response.content)["results"]]
+    assert results[0] == "P100"
+    assert "P102" not in results
@@ -0,0 +1,591 @@
+import hashlib
+import itertools
+import json
+import math
+
+from django.contrib.gis.db.models import GeometryField
+from django.contrib.gis.db.models.functions import AsGeoJSON, GeoFunc, Transform
+from django.contrib.gis.geos import Polygon
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import Count, F, Func, Max, Q, Value
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import path
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.timezone import localdate
+from rest_framework import serializers
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .cache import ALL_OBJECTS, versioned_key
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def get_sparse_fields(request):
+    """
+    Return the field names selected with ?fields= and removed with ?omit=,
+    both comma separated. A parameter that is not given is returned as None.
+    Sparse fieldsets only apply to read requests.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, None
+
+    def parse(name):
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        return {f.strip() for f in value.split(",") if f.strip()}
+
+    return parse("fields"), parse("omit")
+
+
+def source_lookup(model, source):
+    """
+    Return the ORM lookup of the column read by a serializer field source,
+    e.g. "resource.metadata.driverShortName" -> "resource__metadata", or None
+    if the source is not a column (relations, properties, "*").
+    """
+    path = []
+    for attr in source.split("."):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        path.append(attr)
+        if not field.is_relation:
+            if not field.concrete or field in model._meta.pk_fields:
+                return None
+            return "__".join(path)
+        if field.related_model is None or field.many_to_many or field.one_to_many:
+            return None
+        model = field.related_model
+    return None
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Serializer mixin keeping only the fields selected by the ?fields= and
+    ?omit= query parameters of the request in the serializer context.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        only, omit = get_sparse_fields(self.context.get("request"))
+        if only is not None:
+            fields = {name: f for name, f in fields.items() if name in only}
+        if omit is not None:
+            fields = {name: f for name, f in fields.items() if name not in omit}
+        return fields
+
+
+class SparseFieldsViewSetMixin:
+    """
+    Viewset mixin that defers the columns of the serializer fields left out
+    by ?fields= and ?omit=, so they are not read from the database.
+
+    The serializer has to use SparseFieldsSerializerMixin.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        only, omit = get_sparse_fields(self.request)
+        if only is None and omit is None:
+            return queryset
+
+        deferred = self.get_deferred_fields(queryset.model)
+        return queryset.defer(*deferred) if deferred else queryset
+
+    def get_deferred_fields(self, model):
+        serializer_class = self.get_serializer_class()
+        all_fields = serializer_class(context={}).fields.values()
+        kept_fields = self.get_serializer().fields.values()
+
+        def lookups(fields):
+            # identity fields read the lookup field of the instance
+            sources = (
+                getattr(f, "lookup_field", f.source) if f.source == "*" else f.source
+                for f in fields
+            )
+            return {source_lookup(model, source) for source in sources} - {None}
+
+        ordering = getattr(self.paginator, "ordering", None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = {o.lstrip("-") for o in ordering}
+
+        return sorted(lookups(all_fields) - lookups(kept_fields) - ordering)
+
+
+class SimplifyPreserveTopology(GeoFunc):
+    function = "ST_SimplifyPreserveTopology"
+
+
+def zoom_tolerance(zoom: int) -> float:
+    """Return the size in degrees of a pixel of a 256px tile at a zoom level."""
+    return 360 / (256 * 2**zoom)
+
+
+class BBoxField(serializers.CharField):
+    """A minx,miny,maxx,maxy bounding box, as a WGS84 polygon."""
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        try:
+            bbox = [float(v) for v in value.split(",")]
+        except ValueError:
+            bbox = []
+        if (
+            len(bbox) != 4
+            or not all(map(math.isfinite, bbox))
+            or bbox[0] > bbox[2]
+            or bbox[1] > bbox[3]
+        ):
+            raise serializers.ValidationError("Expected minx,miny,maxx,maxy.")
+        polygon = Polygon.from_bbox(bbox)
+        polygon.srid = 4326
+        return polygon
+
+
+class FeatureCollectionQuerySerializer(serializers.Serializer):
+    bbox = BBoxField(required=False)
+    zoom = serializers.IntegerField(required=False, min_value=0, max_value=24)
+    precision = serializers.IntegerField(required=False, min_value=0, max_value=8)
+
+
+class ExportViewSetMixin:
+    """
+    Viewset mixin streaming the whole filtered queryset, without pagination:
+
+    - export/: the serializer output as newline delimited JSON
+    - export-extents/: the extents as GeoJSON text sequences (RFC 8142)
+    - features/: the extents as a GeoJSON FeatureCollection, for maps
+
+    Rows are read with a server-side cursor and serialized by chunks of
+    export_chunk_size, so memory use does not depend on the result size.
+    Geometries are serialized to GeoJSON by the database.
+    """
+
+    export_chunk_size = 500
+    export_extent_field = "extent"
+    export_title_field = "title"
+
+    def get_extent_geojson(self, tolerance=None, precision=8):
+        """
+        Return the GeoJSON of the extent, simplified with the given tolerance
+        and with coordinates rounded to precision decimals.
+        """
+        extent = self.export_extent_field
+        if tolerance:
+            extent = SimplifyPreserveTopology(extent, Value(tolerance))
+        return AsGeoJSON(extent, precision=precision)
+
+    def get_export_extents(self, queryset, geojson=None):
+        """Return (id, title, geojson) of the objects with an extent."""
+        return (
+            queryset.exclude(**{self.export_extent_field: None})
+            .annotate(export_geojson=geojson or self.get_extent_geojson())
+            .values_list("pk", self.export_title_field, "export_geojson")
+        )
+
+    def export_feature(self, pk, title, geojson):
+        # the geometry is already serialized by the database
+        feature_id = json.dumps(str(pk))
+        properties = json.dumps({"title": title})
+        return (
+            f'{{"type": "Feature", "id": {feature_id}, '
+            f'"properties": {properties}, "geometry": {geojson}}}'
+        )
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        def lines():
+            rows = queryset.iterator(chunk_size=self.export_chunk_size)
+            for chunk in itertools.batched(rows, self.export_chunk_size):
+                for data in self.get_serializer(chunk, many=True).data:
+                    yield json.dumps(data, cls=JSONEncoder) + "\n"
+
+        return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
+
+    @action(detail=False, methods=["get"], url_path="export-extents")
+    def export_extents(self, request):
+        queryset = self.get_export_extents(self.filter_queryset(self.get_queryset()))
+
+        def features():
+            rows = queryset.iterator(chunk_size=self.export_chunk_size)
+            for row in rows:
+                yield f"\x1e{self.export_feature(*row)}\n"
+
+        return StreamingHttpResponse(
+            features(), content_type="application/geo+json-seq"
+        )
+
+    @action(detail=False, methods=["get"], url_path="features")
+    def features(self, request):
+        """
+        The extents overlapping ?bbox=minx,miny,maxx,maxy as a FeatureCollection,
+        simplified to the pixel size of the map ?zoom= and with coordinates
+        rounded to ?precision= decimals. The precision defaults to a tenth of
+        a pixel at the zoom level.
+        """
+        params = FeatureCollectionQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        bbox = params.validated_data.get("bbox")
+        zoom = params.validated_data.get("zoom")
+        precision = params.validated_data.get("precision")
+
+        tolerance = None
+        if zoom is not None:
+            tolerance = zoom_tolerance(zoom)
+            if precision is None:
+                precision = min(8, max(0, math.ceil(-math.log10(tolerance / 10))))
+        geojson = self.get_extent_geojson(
+            tolerance, 8 if precision is None else precision
+        )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if bbox is not None:
+            queryset = queryset.filter(
+                **{f"{self.export_extent_field}__bboverlaps": bbox}
+            )
+        queryset = self.get_export_extents(queryset, geojson)
+
+        def collection():
+            yield '{"type": "FeatureCollection", "features": ['
+            rows = queryset.iterator(chunk_size=self.export_chunk_size)
+            for i, row in enumerate(rows):
+                yield ("," if i else "") + self.export_feature(*row)
+            yield "]}\n"
+
+        return StreamingHttpResponse(collection(), content_type="application/geo+json")
+
+
+class NotModified(Exception):
+    """Interrupts a request answered from its validators."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetViewSetMixin:
+    """
+    Viewset mixin adding ETag and Last-Modified to list and retrieve, and
+    answering If-None-Match and If-Modified-Since with 304 Not Modified
+    before the objects are loaded and serialized.
+
+    The validators are aggregated by the database over the filtered
+    queryset: Last-Modified is the latest of the conditional_fields
+    timestamps, and the weak ETag also covers the number of objects, so
+    deletions change the ETag of lists. Lists have no Last-Modified, which
+    deletions would not change, so only their ETag validates them. The ETag
+    covers the number of objects under embargo too, if
+    conditional_embargo_field is the lookup of their embargo end date, as
+    embargoes expire without any write.
+
+    AutoPermissionViewSetMixin loads the object to check its permissions,
+    so this mixin has to come after it in the bases: the validators are
+    checked once the request is authenticated, before the object is loaded.
+    """
+
+    conditional_fields = ("last_modified_at",)
+    conditional_embargo_field = None
+
+    def get_validators(self, queryset):
+        """Return the weak ETag and the last modification of the queryset."""
+        timestamps = {f"max_{i}": Max(f) for i, f in enumerate(self.conditional_fields)}
+        aggregates = {"count": Count("pk"), **timestamps}
+        if self.conditional_embargo_field:
+            aggregates["embargoed"] = Count(
+                "pk",
+                filter=Q(**{f"{self.conditional_embargo_field}__gt": localdate()}),
+            )
+        values = queryset.order_by().aggregate(**aggregates)
+        if not values["count"]:
+            return None, None
+
+        parts = [*values.values(), self.request.accepted_renderer.format]
+        digest = hashlib.md5(
+            "|".join(map(str, parts)).encode(), usedforsecurity=False
+        ).hexdigest()
+        last_modified = max(
+            (values[k] for k in timestamps if values[k] is not None), default=None
+        )
+        return f'W/"{digest}"', last_modified
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.last_modified = None
+        if self.action not in ("list", "retrieve"):
+            return
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.detail:
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        self.etag, last_modified = self.get_validators(queryset)
+        if self.detail and last_modified is not None:
+            self.last_modified = int(last_modified.timestamp())
+        if self.etag is None:
+            return
+
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified
+        )
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, "etag", None) and response.status_code in (200, 304):
+            response["ETag"] = self.etag
+            if self.last_modified is not None:
+                response["Last-Modified"] = http_date(self.last_modified)
+        return response
+
+
+class CachedRetrieveViewSetMixin:
+    """
+    Viewset mixin caching the serialized object of retrieve and of the detail
+    actions calling it, under the versioned key of the object (see
+    shared.cache), so entries are invalidated when its version is bumped.
+
+    AutoPermissionViewSetMixin still checks the object permissions before
+    the handler, so the entries are shared by all the users. The lookup
+    field has to be the primary key.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        key = versioned_key(
+            f"api:{self.basename}:{self.action}",
+            self.get_queryset().model,
+            self.kwargs[self.lookup_url_kwarg or self.lookup_field],
+            request.build_absolute_uri("/"),
+            request.query_params.urlencode(),
+            # content depending on the date, like embargoes, is renewed daily
+            localdate(),
+        )
+        data = cache.get(key)
+        if data is None:
+            data = super().retrieve(request, *args, **kwargs).data
+            cache.set(key, data)
+        return Response(data)
+
+
+class TileEnvelope(Func):
+    function = "ST_TileEnvelope"
+    output_field = GeometryField(srid=3857)
+
+
+class AsMVTGeom(Func):
+    function = "ST_AsMVTGeom"
+    output_field = GeometryField(srid=3857)
+
+
+def tile_bounds(z: int, x: int, y: int, margin: float = 0) -> Polygon:
+    """
+    Return the WGS84 bounding box of a web mercator tile, extended by margin
+    (a fraction of the tile size) on every side.
+    """
+    n = 2**z
+
+    def lon(tx):
+        return tx / n * 360 - 180
+
+    def lat(ty):
+        ty = min(max(ty, 0), n)
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return Polygon.from_bbox(
+        (lon(x - margin), lat(y + 1 + margin), lon(x + 1 + margin), lat(y - margin))
+    )
+
+
+class VectorTileViewSetMixin:
+    """
+    Viewset mixin serving the geometries of the filtered queryset as Mapbox
+    vector tiles: tiles/{z}/{x}/{y}.mvt, routed by tile_urlpatterns.
+
+    Tiles are encoded by PostGIS with ST_AsMVT, with tile_fields as feature
+    properties. They are cached under the version of all the objects of the
+    model (see shared.cache.ALL_OBJECTS), which is bumped when a geometry or
+    a property changes.
+    """
+
+    tile_field = "extent"
+    tile_fields = ("id", "title")
+    tile_extent = 4096
+    tile_buffer = 64
+    tile_max_zoom = 22
+
+    def get_tile(self, z, x, y):
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .filter(
+                **{
+                    f"{self.tile_field}__bboverlaps": tile_bounds(
+                        z, x, y, margin=self.tile_buffer / self.tile_extent
+                    )
+                }
+            )
+            .values(
+                *self.tile_fields,
+                mvt_geom=AsMVTGeom(
+                    Transform(self.tile_field, 3857),
+                    TileEnvelope(Value(z), Value(x), Value(y)),
+                    Value(self.tile_extent),
+                    Value(self.tile_buffer),
+                ),
+            )
+        )
+        # the subquery is compiled by Django, its values are parameters
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT ST_AsMVT(tile, %s, %s, 'mvt_geom') FROM ({sql}) AS tile",  # noqa: S608
+                [self.basename, self.tile_extent, *params],
+            )
+            tile = cursor.fetchone()[0]
+        return bytes(tile) if tile else b""
+
+    @classmethod
+    def tile_urlpatterns(cls, prefix, basename):
+        """
+        Return the route of the tiles under prefix. Unlike the routes of the
+        router it has no trailing slash, which tile clients do not request.
+        """
+        return [
+            path(
+                f"{prefix}/tiles/<int:z>/<int:x>/<int:y>.mvt",
+                cls.as_view({"get": "tiles"}, basename=basename, detail=False),
+                name=f"{basename}-tiles",
+            )
+        ]
+
+    def tiles(self, request, z, x, y):
+        if z > self.tile_max_zoom or x >= 2**z or y >= 2**z:
+            raise NotFound("Tile out of range.")
+
+        key = versioned_key(
+            f"mvt:{self.basename}",
+            self.get_queryset().model,
+            ALL_OBJECTS,
+            z,
+            x,
+            y,
+            request.query_params.urlencode(),
+            # filters may depend on the user, unfiltered tiles are shared
+            request.user.pk if request.query_params else None,
+        )
+        tile = cache.get(key)
+        if tile is None:
+            tile = self.get_tile(z, x, y)
+            cache.set(key, tile)
+        return HttpResponse(tile, content_type="application/vnd.mapbox-vector-tile")
+
+
+WORLD = Polygon(
+    ((-180, -90), (-180, 90), (180, 90), (180, -90), (-180, -90)), srid=4326
+)
+
+
+class CoverageQuerySerializer(serializers.Serializer):
+    size = serializers.FloatField(required=False, min_value=0.001, max_value=180)
+    bbox = BBoxField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+
+class CoverageViewSetMixin:
+    """
+    Viewset mixin counting the objects of the filtered queryset whose
+    geometry intersects each cell of a square grid: coverage/
+
+    The grid has cells of ?size= degrees, aligned on 0,0, over ?bbox= or
+    the whole world, and at most coverage_max_cells cells. Only the objects
+    created between ?created_after= and ?created_before= are counted. The
+    grid is built and joined to the geometries by PostGIS with ST_SquareGrid
+    in a single query, and only the cells with objects are returned.
+
+    Results are cached under the version of all the objects of the model
+    (see shared.cache.ALL_OBJECTS), like the vector tiles.
+    """
+
+    coverage_field = "extent"
+    coverage_cell_size = 1.0
+    coverage_max_cells = 100_000
+
+    def get_coverage(self, queryset, size, bbox):
+        """Return (i, j, count) of the cells of the grid with objects."""
+        queryset = (
+            queryset.filter(**{f"{self.coverage_field}__bboverlaps": bbox})
+            .order_by()
+            .values(coverage_id=F("pk"), coverage_geom=F(self.coverage_field))
+        )
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                # the subquery is compiled by Django, its values are parameters
+                "SELECT cell.i, cell.j, count(DISTINCT t.coverage_id) "  # noqa: S608
+                "FROM ST_SquareGrid(%s, ST_GeomFromEWKT(%s)) AS cell "
+                f"JOIN ({sql}) AS t ON ST_Intersects(cell.geom, t.coverage_geom) "
+                "GROUP BY cell.i, cell.j ORDER BY cell.i, cell.j",
+                [size, bbox.ewkt, *params],
+            )
+            return cursor.fetchall()
+
+    @action(detail=False, methods=["get"], url_path="coverage")
+    def coverage(self, request):
+        params = CoverageQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        size = params.validated_data.get("size", self.coverage_cell_size)
+        bbox = params.validated_data.get("bbox") or WORLD
+        xmin, ymin, xmax, ymax = bbox.extent
+        cells = math.ceil((xmax - xmin) / size + 1) * math.ceil(
+            (ymax - ymin) / size + 1
+        )
+        if cells > self.coverage_max_cells:
+            raise ValidationError({"size": ["Too many cells, increase the size."]})
+
+        key = versioned_key(
+            f"coverage:{self.basename}",
+            self.get_queryset().model,
+            ALL_OBJECTS,
+            request.query_params.urlencode(),
+            # filters may depend on the user, unfiltered counts are shared
+            request.user.pk if request.query_params else None,
+        )
+        data = cache.get(key)
+        if data is None:
+            queryset = self.filter_queryset(self.get_queryset())
+            if created_after := params.validated_data.get("created_after"):
+                queryset = queryset.filter(created_at__gte=created_after)
+            if created_before := params.validated_data.get("created_before"):
+                queryset = queryset.filter(created_at__lt=created_before)
+            data = {
+                "size": size,
+                "cells": [
+                    {
+                        "i": i,
+                        "j": j,
+                        "bbox": [i * size, j * size, (i + 1) * size, (j + 1) * size],
+                        "count": count,
+                    }
+                    for i, j, count in self.get_coverage(queryset, size, bbox)
+                ],
+            }
+            cache.set(key, data)
+        return Response(data)
@@ -0,0 +1,74 @@
+import functools
+import hashlib
+import operator
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.functions import Greatest
+from django.http import HttpResponse
+
+
+class TrigramAutocompleteMixin:
+    """
+    Mixin for autocomplete.Select2QuerySetView that searches the search_fields
+    with the pg_trgm word similarity operator, backed by a GIN trigram index,
+    and orders the results by similarity.
+
+    Responses are cached for cache_timeout seconds per query.
+    Queries shorter than min_trigram_length fall back to a case insensitive
+    prefix search.
+    """
+
+    min_trigram_length = 3
+    cache_timeout = 30
+
+    def get_search_results(self, queryset, search_term):
+        search_term = search_term.strip() if search_term else search_term
+        if not search_term:
+            return queryset
+
+        search_fields = self.get_search_fields()
+        if len(search_term) < self.min_trigram_length:
+            return queryset.filter(
+                functools.reduce(
+                    operator.or_,
+                    [Q(**{f"{f}__istartswith": search_term}) for f in search_fields],
+                )
+            )
+
+        similarities = [TrigramWordSimilarity(search_term, f) for f in search_fields]
+        return (
+            queryset.filter(
+                functools.reduce(
+                    operator.or_,
+                    [
+                        Q(**{f"{f}__trigram_word_similar": search_term})
+                        for f in search_fields
+                    ],
+                )
+            )
+            .annotate(
+                similarity=(
+                    Greatest(*similarities)
+                    if len(similarities) > 1
+                    else similarities[0]
+                )
+            )
+            .order_by("-similarity", "pk")
+        )
+
+    def get_cache_key(self):
+        path = f"{self.__class__.__qualname__}:{self.request.get_full_path()}"
+        digest = hashlib.md5(path.encode(), usedforsecurity=False).hexdigest()
+        return f"autocomplete:{digest}"
+
+    def get(self, request, *args, **kwargs):
+        key = self.get_cache_key()
+        if (content := cache.get(key)) is not None:
+            return HttpResponse(content, content_type="application/json")
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.content, self.cache_timeout)
+        return response
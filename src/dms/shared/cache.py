@@ -0,0 +1,66 @@
+import hashlib
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Every cached object has a version token in the cache, and the keys of the
+# entries built from an object include its token: bumping the token
+# invalidates all of them without knowing their keys. Tokens are random, so
+# an evicted token cannot bring an older entry back.
+
+# pk of the version of the content built from all the objects of a model
+ALL_OBJECTS = "*"
+
+
+def version_label(model) -> str:
+    """Label of the versions of a model, shared by multi-table subclasses."""
+    parents = model._meta.get_parent_list()
+    return (parents[-1] if parents else model)._meta.label_lower
+
+
+def version_key(model, pk) -> str:
+    return f"version:{version_label(model)}:{pk}"
+
+
+def get_version(model, pk) -> str:
+    """Return the version token of an object, creating it if missing."""
+    key = version_key(model, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_versions(model, pks):
+    """
+    Invalidate the cache entries of the objects with the given primary keys,
+    once the current transaction is committed.
+
+    Bumping on commit ensures that an entry built from data read before the
+    commit is never stored under the new version.
+    """
+    keys = [version_key(model, pk) for pk in set(pks) if pk is not None]
+    if keys:
+        transaction.on_commit(
+            lambda: cache.set_many({key: uuid4().hex for key in keys}, timeout=None)
+        )
+
+
+def versioned_key(name: str, model, pk, *variant) -> str:
+    """
+    Return the cache key of the entry name built from an object.
+
+    Args:
+        name (str): name of the cached content
+        model: the model of the object the content is built from
+        pk: the primary key of the object
+        variant: anything else the content depends on, e.g. the permissions
+            of the user, so users with the same permissions share entries
+    """
+    digest = hashlib.md5(
+        "|".join(map(str, variant)).encode(), usedforsecurity=False
+    ).hexdigest()
+    version = get_version(model, pk)
+    return f"{name}:{version_label(model)}:{pk}:{version}:{digest}"
@@ -1,9 +1,11 @@
 from dal import autocomplete
 
+from dms.shared.autocomplete import TrigramAutocompleteMixin
+
 from .models import User
 
 
-class UserAutocomplete(autocomplete.Select2QuerySetView):
+class UserAutocomplete(TrigramAutocompleteMixin, autocomplete.Select2QuerySetView):
     model = User
     search_fields = ["username", "email", "first_name", "last_name"]
 
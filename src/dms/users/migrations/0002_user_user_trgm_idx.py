@@ -0,0 +1,22 @@
+# Generated by Django 6.0.6 on 2026-10-18 10:02
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0003_trigram_extension_tag_name_trgm_idx"),
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["username", "email", "first_name", "last_name"],
+                name="user_trgm_idx",
+                opclasses=["gin_trgm_ops"] * 4,
+            ),
+        ),
+    ]
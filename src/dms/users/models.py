@@ -1,4 +1,5 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
 from django.db.models import CharField, EmailField
 from django.utils.translation import gettext_lazy as _
 
@@ -16,5 +17,14 @@ class User(AbstractUser):
 
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            GinIndex(
+                fields=["username", "email", "first_name", "last_name"],
+                name="user_trgm_idx",
+                opclasses=["gin_trgm_ops"] * 4,
+            ),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}".strip() or self.username